@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class MaintenanceModeConfig(AppConfig):
+    name = "maintenance_mode"
+
+    def ready(self):
+        # register the system checks
+        from maintenance_mode import checks  # noqa: F401
@@ -1,17 +1,33 @@
+import concurrent.futures
 import json
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.staticfiles.storage import staticfiles_storage
-from django.core.cache import cache, caches
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
 from django.core.exceptions import ImproperlyConfigured
 from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
 
-from maintenance_mode.io import read_file, write_file
+from maintenance_mode.breakers import CircuitBreaker
+from maintenance_mode.io import get_file_key, read_file, write_file
+from maintenance_mode.shared_memory import SharedMemorySegment
+from maintenance_mode.utils import call_closing_connections
+from maintenance_mode.watchers import FileWatcher
 
 logger = logging.getLogger(__name__)
 
+_circuit_breakers_lock = threading.Lock()
+
 
 class AbstractStateBackend:
     @staticmethod
@@ -58,83 +74,628 @@ class AbstractStateBackend:
             return cls.validate_schedule_state_value(json.loads(value))
         return cls.from_str_to_bool_value(value)
 
+    @staticmethod
+    def copy_state_values(values, keys):
+        # schedule states are dicts, callers must not alter the kept ones
+        return {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in values.items()
+            if key in keys
+        }
+
     def get_value(self):
         raise NotImplementedError()
 
     def set_value(self, value):
         raise NotImplementedError()
 
+    # the default async methods run the sync ones in the thread used for the database
+    # (thread_sensitive), backends which don't use the database can disable it
+    async_thread_sensitive = True
+
+    # backends which keep the state in the memory of each process,
+    # used by ChainedBackend to know which tiers can be backfilled on reads
+    process_local = False
+
+    async def aget_value(self):
+        """
+        Async version of get_value(), by default get_value() is run in a thread.
+        """
+        return await sync_to_async(
+            self.get_value, thread_sensitive=self.async_thread_sensitive
+        )()
+
+    async def aset_value(self, value):
+        """
+        Async version of set_value(), by default set_value() is run in a thread.
+        """
+        await sync_to_async(
+            self.set_value, thread_sensitive=self.async_thread_sensitive
+        )(value)
+
+    def supports_scopes(self):
+        """
+        Tell if the backend supports scoped states (get_values / set_values).
+        """
+        return type(self).get_values is not AbstractStateBackend.get_values
+
+    def get_values(self, keys):
+        """
+        Get the state values of the given scopes (keys) with a single call,
+        the scopes without a state are not included in the returned dict.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} doesn't support scoped states."
+        )
+
+    def set_values(self, mapping):
+        """
+        Set the state values of the given scopes ({key: value}) with a single call.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} doesn't support scoped states."
+        )
+
+    async def aget_values(self, keys):
+        """
+        Async version of get_values(), by default get_values() is run in a thread.
+        """
+        return await sync_to_async(
+            self.get_values, thread_sensitive=self.async_thread_sensitive
+        )(keys)
+
+    async def aset_values(self, mapping):
+        """
+        Async version of set_values(), by default set_values() is run in a thread.
+        """
+        await sync_to_async(
+            self.set_values, thread_sensitive=self.async_thread_sensitive
+        )(mapping)
+
+    def supports_hosts(self):
+        """
+        Tell if the backend supports per-host states (get_hosts / set_hosts).
+        """
+        return type(self).get_hosts is not AbstractStateBackend.get_hosts
+
+    def get_hosts(self):
+        """
+        Get the frozenset of the hosts in maintenance mode.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} doesn't support per-host states."
+        )
+
+    def set_hosts(self, hosts):
+        """
+        Set the hosts in maintenance mode (replacing the current ones).
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} doesn't support per-host states."
+        )
+
+    def update_hosts(self, add=(), remove=()):
+        """
+        Add / remove hosts in maintenance mode.
+        """
+        hosts = self.get_hosts()
+        self.set_hosts((hosts | frozenset(add)) - frozenset(remove))
+
+    async def aget_hosts(self):
+        """
+        Async version of get_hosts(), by default get_hosts() is run in a thread.
+        """
+        return await sync_to_async(
+            self.get_hosts, thread_sensitive=self.async_thread_sensitive
+        )()
+
+    async def aset_hosts(self, hosts):
+        """
+        Async version of set_hosts(), by default set_hosts() is run in a thread.
+        """
+        await sync_to_async(
+            self.set_hosts, thread_sensitive=self.async_thread_sensitive
+        )(hosts)
+
+    async def aupdate_hosts(self, add=(), remove=()):
+        """
+        Async version of update_hosts(), by default update_hosts() is run in a thread.
+        """
+        await sync_to_async(
+            self.update_hosts, thread_sensitive=self.async_thread_sensitive
+        )(add, remove)
+
+    @staticmethod
+    def from_hosts_to_str_value(hosts):
+        return "\n".join(sorted(hosts))
+
+    @staticmethod
+    def from_str_to_hosts_value(value):
+        return frozenset(host for host in value.split() if host)
+
+    def _get_kept_hosts(self, version):
+        state = getattr(self, "_hosts_state", None)
+        if state is not None and state[0] == version:
+            return state[1]
+        return None
+
+    def _keep_hosts(self, version, value):
+        hosts = self.from_str_to_hosts_value(value or "")
+        self._hosts_state = (version, hosts)
+        return hosts
+
+    def _get_versioned_hosts(self, version, loader):
+        # the hosts set is loaded again only when its version changes
+        if version is None:
+            self._hosts_state = None
+            return frozenset()
+        hosts = self._get_kept_hosts(version)
+        if hosts is None:
+            hosts = self._keep_hosts(*loader())
+        return hosts
+
+    def _get_last_hosts(self):
+        # the last loaded hosts are served while the backend is failing
+        state = getattr(self, "_hosts_state", None)
+        return None if state is None else state[1]
+
+    def _get_hosts_or_last(self, func, *args):
+        try:
+            return self.circuit_breaker.call(func, *args)
+        except Exception:
+            hosts = self._get_last_hosts()
+            if hosts is None:
+                raise
+            return hosts
+
+    def get_versioned_value(self):
+        """
+        Get a (version, value) tuple, the version is None if not supported
+        by the backend, it is used by ReplicatedBackend to pick the newest state.
+        """
+        return (None, self.get_value())
+
+    def set_versioned_value(self, value, version):
+        """
+        Set the state value together with its version (an increasing integer),
+        the version is discarded if not supported by the backend.
+        Errors must be raised, so that ReplicatedBackend doesn't count
+        a failed write as acknowledged.
+        """
+        self.set_value(value)
+
+    def lookup_value(self):
+        """
+        Get the state value or None if the backend has no state
+        (eg. expired or evicted), it is used by ChainedBackend to detect misses.
+        By default the backend is assumed to always have a state.
+        """
+        return self.get_value()
+
+    # the calls limited by 'settings.MAINTENANCE_MODE_STATE_BACKEND_TIMEOUT'
+    # run in a thread pool, backends which limit them natively (eg. the database)
+    # disable it
+    circuit_breaker_thread_timeout = True
+
+    @property
+    def circuit_breaker(self):
+        """
+        The circuit breaker (created lazily) which guards the backend calls.
+        """
+        breaker = getattr(self, "_circuit_breaker", None)
+        if breaker is None:
+            with _circuit_breakers_lock:
+                breaker = getattr(self, "_circuit_breaker", None)
+                if breaker is None:
+                    breaker = CircuitBreaker(
+                        self.__class__.__name__,
+                        failure_threshold=(
+                            settings.MAINTENANCE_MODE_STATE_BACKEND_FAILURE_THRESHOLD
+                        ),
+                        retry_interval=(
+                            settings.MAINTENANCE_MODE_STATE_BACKEND_RETRY_INTERVAL
+                        ),
+                        max_retry_interval=(
+                            settings.MAINTENANCE_MODE_STATE_BACKEND_MAX_RETRY_INTERVAL
+                        ),
+                        timeout=(
+                            settings.MAINTENANCE_MODE_STATE_BACKEND_TIMEOUT
+                            if self.circuit_breaker_thread_timeout
+                            else None
+                        ),
+                    )
+                    self._circuit_breaker = breaker
+        return breaker
+
+    def close(self):
+        """
+        Release the resources held by the backend (if any),
+        it is called when the backend instance is discarded.
+        """
+        pass
 
-class DefaultStorageBackend(AbstractStateBackend):
+
+class AbstractStorageBackend(AbstractStateBackend):
     """
-    django-maintenance-mode backend which uses the default storage.
-    Kindly provided by Dominik George https://github.com/Natureshadow
+    Base class for the backends which use a Django storage.
+    The state file is read with a single open() (a missing file means False)
+    and overwritten without removing it first whenever the storage allows it,
+    so that there is no instant in which the state file doesn't exist.
+    The parsed state is kept in memory together with the state file version
+    (see 'get_storage_version'), so revalidating it costs a metadata request.
     """
 
+    async_thread_sensitive = False
+
+    def __init__(self):
+        super().__init__()
+        self._state = None
+
+    def get_storage(self):
+        raise NotImplementedError()
+
+    def get_storage_version(self, storage, filename):
+        """
+        Return a token that changes whenever the state file changes,
+        or None if it is unknown (the state file is read again in this case).
+        Override it to use storage specific metadata (eg. ETag).
+        """
+        if isinstance(storage, FileSystemStorage):
+            return get_file_key(storage.path(filename))
+        modified_time = storage.get_modified_time(filename)
+        # most object storages have a 1 second resolution for the modified time,
+        # it is a reliable version only if the file has not been modified since then
+        if (timezone.now() - modified_time).total_seconds() < 1:
+            return None
+        return modified_time
+
     def _get_filename(self):
         return settings.MAINTENANCE_MODE_STATE_FILE_NAME
 
+    def _get_storage_value(self, storage, filename):
+        try:
+            version = self.get_storage_version(storage, filename)
+        except Exception:
+            # eg. the state file doesn't exist or metadata are not supported
+            version = None
+        state = self._state
+        if (
+            version is not None
+            and state is not None
+            and state[0] == (filename, version)
+        ):
+            return state[1]
+        try:
+            with storage.open(filename, "r") as statefile:
+                value = statefile.read()
+        except FileNotFoundError:
+            return False
+        if isinstance(value, bytes):
+            value = value.decode()
+        value = self.from_str_to_state_value(value)
+        # the version is read before the content, so a newer content
+        # could be stored with an older version (and read again), never the opposite
+        self._state = ((filename, version), value) if version is not None else None
+        return value
+
+    def _set_storage_value(self, storage, filename, value):
+        if isinstance(storage, FileSystemStorage):
+            # local storage, replace the state file atomically
+            write_file(storage.path(filename), value)
+            return
+        if storage.get_available_name(filename) != filename:
+            # the storage doesn't overwrite existing files (no way to avoid the gap)
+            storage.delete(filename)
+        storage.save(filename, ContentFile(value.encode()))
+
     def get_value(self):
-        filename = self._get_filename()
-        if default_storage.exists(filename):
-            with default_storage.open(filename, "r") as statefile:
-                return self.from_str_to_state_value(statefile.read())
-        return False
+        value = self.circuit_breaker.read(
+            self._get_storage_value, self.get_storage(), self._get_filename()
+        )
+        return dict(value) if isinstance(value, dict) else value
 
     def set_value(self, value):
-        filename = self._get_filename()
-        if default_storage.exists(filename):
-            default_storage.delete(filename)
-        content = ContentFile(self.from_state_to_str_value(value).encode())
-        default_storage.save(filename, content)
+        value = self.from_state_to_str_value(value)
+        self._state = None
+        self.circuit_breaker.write(
+            self._set_storage_value, self.get_storage(), self._get_filename(), value
+        )
 
 
-class StaticStorageBackend(AbstractStateBackend):
+class DefaultStorageBackend(AbstractStorageBackend):
     """
-    django-maintenance-mode backend which uses the staticfiles storage.
+    django-maintenance-mode backend which uses the default storage.
+    Kindly provided by Dominik George https://github.com/Natureshadow
     """
 
-    def get_value(self):
-        filename = settings.MAINTENANCE_MODE_STATE_FILE_NAME
-        if staticfiles_storage.exists(filename):
-            with staticfiles_storage.open(filename, "r") as statefile:
-                return self.from_str_to_state_value(statefile.read())
-        return False
+    def get_storage(self):
+        return default_storage
 
-    def set_value(self, value):
-        filename = settings.MAINTENANCE_MODE_STATE_FILE_NAME
-        if staticfiles_storage.exists(filename):
-            staticfiles_storage.delete(filename)
-        content = ContentFile(self.from_state_to_str_value(value).encode())
-        staticfiles_storage.save(filename, content)
+
+class StaticStorageBackend(AbstractStorageBackend):
+    """
+    django-maintenance-mode backend which uses the staticfiles storage.
+    """
+
+    def get_storage(self):
+        return staticfiles_storage
 
 
 class LocalFileBackend(AbstractStateBackend):
     """
     django-maintenance-mode backend which uses the local file system.
+    The parsed state is kept in memory and the state file is read again
+    only when its identity (inode, modification time, size) changes.
+    If 'settings.MAINTENANCE_MODE_STATE_FILE_WATCH' is True, the state file
+    is watched by a background thread (inotify with polling fallback),
+    and the in-memory state is served without any syscall until it changes.
+    In async code the in-memory state is revalidated inline (a single stat call),
+    the state file is read in a thread only when it has changed.
+    Scoped states are stored in a single JSON file next to the state file,
+    and per-host states in a text file (one host per line).
     """
 
+    async_thread_sensitive = False
+
+    def __init__(self):
+        super().__init__()
+        self._state = None
+        self._state_generation = 0
+        self._scopes_state = None
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+
     def _get_filepath(self):
         return f"{settings.MAINTENANCE_MODE_STATE_FILE_PATH}"
 
+    def _get_scopes_filepath(self):
+        return f"{settings.MAINTENANCE_MODE_STATE_FILE_PATH}.scopes"
+
+    def _get_hosts_filepath(self):
+        return f"{settings.MAINTENANCE_MODE_STATE_FILE_PATH}.hosts"
+
+    def _invalidate_state(self):
+        self._state = None
+        self._state_generation += 1
+
+    def _get_watcher(self, filepath):
+        watcher = self._watcher
+        if watcher is not None and watcher.running and watcher.filepath == filepath:
+            return watcher
+        with self._watcher_lock:
+            watcher = self._watcher
+            if watcher is None or watcher.filepath != filepath:
+                if watcher is not None:
+                    watcher.stop()
+                watcher = FileWatcher(
+                    filepath,
+                    self._invalidate_state,
+                    interval=settings.MAINTENANCE_MODE_STATE_FILE_WATCH_INTERVAL,
+                )
+                self._watcher = watcher
+            if not watcher.running:
+                # (re)started, eg. in a forked child process:
+                # changes could have been missed in the meanwhile
+                watcher.start()
+                self._invalidate_state()
+        return watcher
+
+    def _get_watched_value(self, filepath):
+        self._get_watcher(filepath)
+        state = self._state
+        if state is not None and state[0] is not None and state[0][0] == filepath:
+            value = state[1]
+            return True, dict(value) if isinstance(value, dict) else value
+        return False, None
+
     def get_value(self):
-        value = read_file(self._get_filepath(), "0")
-        value = self.from_str_to_state_value(value)
-        return value
+        filepath = self._get_filepath()
+        if settings.MAINTENANCE_MODE_STATE_FILE_WATCH:
+            found, value = self._get_watched_value(filepath)
+            if found:
+                return value
+        return self.circuit_breaker.read(self._get_file_value, filepath)
+
+    def _get_kept_value(self, filepath):
+        state = self._state
+        if state is None or state[0] is None:
+            return False, None
+        try:
+            file_key = get_file_key(filepath)
+        except OSError:
+            return False, None
+        if file_key != state[0]:
+            return False, None
+        value = state[1]
+        return True, dict(value) if isinstance(value, dict) else value
+
+    async def aget_value(self):
+        filepath = self._get_filepath()
+        if settings.MAINTENANCE_MODE_STATE_FILE_WATCH:
+            # the watched state is served from memory, without a thread
+            found, value = self._get_watched_value(filepath)
+        else:
+            found, value = self._get_kept_value(filepath)
+        if found:
+            return value
+        return await super().aget_value()
+
+    def _get_file_value(self, filepath):
+        state = self._state
+        generation = self._state_generation
+        file_key = get_file_key(filepath)
+        if file_key is None or state is None or state[0] != file_key:
+            value = read_file(filepath, "0")
+            value = self.from_str_to_state_value(value)
+            state = (file_key, value)
+            if file_key is not None and generation == self._state_generation:
+                self._state = state
+        value = state[1]
+        return dict(value) if isinstance(value, dict) else value
+
+    def set_value(self, value):
+        value = self.from_state_to_str_value(value)
+        self._invalidate_state()
+        self.circuit_breaker.write(write_file, self._get_filepath(), value)
+
+    def _read_scopes_file(self, filepath):
+        return json.loads(read_file(filepath, "{}") or "{}")
+
+    def _get_scopes_file_values(self, filepath):
+        file_key = get_file_key(filepath)
+        if file_key is None:
+            return {}
+        state = self._scopes_state
+        if state is not None and state[0] == file_key:
+            return state[1]
+        values = {
+            key: self.from_str_to_state_value(value)
+            for key, value in self._read_scopes_file(filepath).items()
+        }
+        self._scopes_state = (file_key, values)
+        return values
+
+    def _set_scopes_file_values(self, filepath, mapping):
+        # read-modify-write, concurrent writers of different scopes can conflict
+        values = self._read_scopes_file(filepath)
+        values.update(mapping)
+        write_file(filepath, json.dumps(values, sort_keys=True))
+
+    def get_values(self, keys):
+        values = self.circuit_breaker.call(
+            self._get_scopes_file_values, self._get_scopes_filepath()
+        )
+        return self.copy_state_values(values, keys)
+
+    def set_values(self, mapping):
+        mapping = {
+            key: self.from_state_to_str_value(value) for key, value in mapping.items()
+        }
+        self._scopes_state = None
+        self.circuit_breaker.write(
+            self._set_scopes_file_values, self._get_scopes_filepath(), mapping
+        )
+
+    def _get_hosts_file_value(self, filepath):
+        return self._get_versioned_hosts(
+            get_file_key(filepath),
+            lambda: (get_file_key(filepath), read_file(filepath)),
+        )
+
+    def get_hosts(self):
+        return self._get_hosts_or_last(
+            self._get_hosts_file_value, self._get_hosts_filepath()
+        )
+
+    def set_hosts(self, hosts):
+        self.circuit_breaker.write(
+            write_file, self._get_hosts_filepath(), self.from_hosts_to_str_value(hosts)
+        )
+
+    def close(self):
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.stop()
+                self._watcher = None
+        self._invalidate_state()
+        self._scopes_state = None
+
+
+class SharedMemoryBackend(AbstractStateBackend):
+    """
+    django-maintenance-mode backend which uses a small memory-mapped file
+    shared by all the processes of the host.
+    The state is protected by a sequence counter, so reading it is lock-free
+    and costs a single memory load until the state changes,
+    and all the processes of the host see the new state at the same instant.
+    """
+
+    async_thread_sensitive = False
+
+    def __init__(self):
+        super().__init__()
+        self._segment = None
+        self._segment_lock = threading.Lock()
+        self._state = None
+
+    def _get_filepath(self):
+        filepath = settings.MAINTENANCE_MODE_STATE_SHARED_MEMORY_PATH
+        if not filepath:
+            filepath = f"{settings.MAINTENANCE_MODE_STATE_FILE_PATH}.shm"
+        return filepath
+
+    def _get_segment(self):
+        filepath = self._get_filepath()
+        segment = self._segment
+        if segment is None or segment.filepath != filepath:
+            with self._segment_lock:
+                segment = self._segment
+                if segment is None or segment.filepath != filepath:
+                    if segment is not None:
+                        segment.close()
+                    segment = SharedMemorySegment(filepath)
+                    self._segment = segment
+                    self._state = None
+        return segment
+
+    def get_value(self):
+        return self.circuit_breaker.read(self._get_segment_value)
+
+    async def aget_value(self):
+        # reading the state is a memory load, it doesn't need a thread
+        return self.get_value()
+
+    def _get_segment_value(self):
+        segment = self._get_segment()
+        state = self._state
+        if state is None or state[0] != segment.sequence:
+            sequence, payload = segment.read()
+            value = self.from_str_to_state_value(payload.decode() or "0")
+            state = (sequence, value)
+            self._state = state
+        value = state[1]
+        return dict(value) if isinstance(value, dict) else value
 
     def set_value(self, value):
         value = self.from_state_to_str_value(value)
-        write_file(self._get_filepath(), value)
+        self.circuit_breaker.write(self._set_segment_value, value.encode())
+
+    def _set_segment_value(self, payload):
+        self._get_segment().write(payload)
+
+    def close(self):
+        with self._segment_lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            self._state = None
 
 
 class CacheBackend(AbstractStateBackend):
     """
     django-maintenance-mode backend which uses
     [Django's cache framework](https://docs.djangoproject.com/en/dev/topics/cache/#django-s-cache-framework).
+    Each write also sets a version key (a timestamp), readers keep the last
+    read state in memory and revalidate it at most once every
+    'settings.MAINTENANCE_MODE_CACHE_BACKEND_CHECK_INTERVAL' seconds
+    by reading only the version key, the value is read (and parsed) again
+    only when the version changes (both keys are read with a single call).
     """
 
+    cache_key = "maintenance_mode"
+    cache_version_key = "maintenance_mode_version"
+    # not a scope key, so that it can't collide with a scope named "hosts"
+    hosts_cache_key = "maintenance_mode_hosts"
+
+    # the async methods use Django's async cache API
+    async_thread_sensitive = False
+
+    def __init__(self):
+        super().__init__()
+        self._state = None
+
     @staticmethod
-    def get_cache():
+    def get_cache_name():
         cache_name = settings.MAINTENANCE_MODE_CACHE_BACKEND
         if cache_name:
             if cache_name not in settings.CACHES:
@@ -143,35 +704,821 @@ class CacheBackend(AbstractStateBackend):
                     "'MAINTENANCE_MODE_CACHE_BACKEND' is not defined in "
                     "settings.CACHES."
                 )
-            return caches[cache_name]
-        return (
-            caches["maintenance_mode"]
-            if "maintenance_mode" in settings.CACHES
-            else cache
+            return cache_name
+        if "maintenance_mode" in settings.CACHES:
+            return "maintenance_mode"
+        return DEFAULT_CACHE_ALIAS
+
+    @classmethod
+    def get_cache(cls):
+        cache_name = cls.get_cache_name()
+        if cache_name == DEFAULT_CACHE_ALIAS:
+            return cache
+        return caches[cache_name]
+
+    def _get_kept_state(self, cache_name, now):
+        # (cache_name, version, value, checked_at), the unset state is kept too
+        state = self._state
+        if state is None or state[0] != cache_name:
+            return None, False
+        check_interval = settings.MAINTENANCE_MODE_CACHE_BACKEND_CHECK_INTERVAL
+        return state, bool(check_interval and now - state[3] < check_interval)
+
+    def _keep_checked_state(self, state, now):
+        self._state = (*state[:3], now)
+        return state[1:3]
+
+    def _keep_state(self, cache_name, values, now):
+        # the version is read before the value, so that a new version
+        # is never kept with an old value (the value is written first)
+        version = values.get(self.cache_version_key)
+        value = values.get(self.cache_key)
+        if value is not None:
+            value = self.from_str_to_state_value(value)
+        self._state = (cache_name, version, value, now)
+        return (version, value)
+
+    def _get_cache_state(self, cache_name, cache):
+        now = time.monotonic()
+        state, fresh = self._get_kept_state(cache_name, now)
+        if fresh:
+            return state[1:3]
+        # values written without version (eg. by older versions) are read again
+        if state is not None and state[1] is not None:
+            if cache.get(self.cache_version_key) == state[1]:
+                return self._keep_checked_state(state, now)
+        values = cache.get_many([self.cache_version_key, self.cache_key])
+        return self._keep_state(cache_name, values, now)
+
+    async def _aget_cache_state(self, cache_name, cache):
+        now = time.monotonic()
+        state, fresh = self._get_kept_state(cache_name, now)
+        if fresh:
+            return state[1:3]
+        if state is not None and state[1] is not None:
+            if await cache.aget(self.cache_version_key) == state[1]:
+                return self._keep_checked_state(state, now)
+        values = await cache.aget_many([self.cache_version_key, self.cache_key])
+        return self._keep_state(cache_name, values, now)
+
+    def _set_cache_value(self, cache, value, version=None):
+        # the value must be written before the version,
+        # a timestamp version never repeats (a counter restarts after eviction)
+        if version is None:
+            version = time.time_ns()
+        cache.set(self.cache_key, value, None)
+        cache.set(self.cache_version_key, version, None)
+
+    async def _aset_cache_value(self, cache, value, version=None):
+        if version is None:
+            version = time.time_ns()
+        await cache.aset(self.cache_key, value, None)
+        await cache.aset(self.cache_version_key, version, None)
+
+    def _read_cache_state(self):
+        version, value = self.circuit_breaker.read(
+            self._get_cache_state, self.get_cache_name(), self.get_cache()
         )
+        return (version, dict(value) if isinstance(value, dict) else value)
+
+    def lookup_value(self):
+        return self._read_cache_state()[1]
+
+    def get_versioned_value(self):
+        version, value = self._read_cache_state()
+        return (version, False if value is None else value)
 
     def get_value(self):
+        try:
+            value = self.lookup_value()
+        except self.circuit_breaker.ignored_exceptions:
+            raise
+        except Exception:
+            # already logged (rate-limited) by the circuit breaker
+            return settings.MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE
+        return False if value is None else value
+
+    async def aget_value(self):
+        try:
+            version, value = await self.circuit_breaker.aread(
+                self._aget_cache_state, self.get_cache_name(), self.get_cache()
+            )
+        except self.circuit_breaker.ignored_exceptions:
+            raise
+        except Exception:
+            # already logged (rate-limited) by the circuit breaker
+            return settings.MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE
+        if value is None:
+            return False
+        return dict(value) if isinstance(value, dict) else value
+
+    async def aset_value(self, value):
+        value = self.from_state_to_str_value(value)
         cache = self.get_cache()
+        self._state = None
         try:
-            value = cache.get("maintenance_mode", "0")
+            await self.circuit_breaker.awrite(self._aset_cache_value, cache, value)
         except Exception as error:
             logger.warning(
                 "The following unexpected exception has been raised "
-                "while trying to get the maintenance mode cache key."
+                "while trying to set the maintenance mode cache key."
                 f"\nException: {error}"
             )
-            return settings.MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE
-        value = self.from_str_to_state_value(value)
-        return value
+
+    def _get_scope_cache_key(self, key):
+        return f"{self.cache_key}:{key}"
+
+    def _get_scope_values(self, cache_keys, values):
+        return {
+            cache_keys[cache_key]: self.from_str_to_state_value(value)
+            for cache_key, value in values.items()
+        }
+
+    def _get_scope_cache_values(self, mapping):
+        return {
+            self._get_scope_cache_key(key): self.from_state_to_str_value(value)
+            for key, value in mapping.items()
+        }
+
+    def get_values(self, keys):
+        cache = self.get_cache()
+        cache_keys = {self._get_scope_cache_key(key): key for key in keys}
+        try:
+            values = self.circuit_breaker.call(cache.get_many, list(cache_keys))
+        except Exception:
+            # already logged (rate-limited) by the circuit breaker
+            fallback_value = settings.MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE
+            return dict.fromkeys(keys, fallback_value)
+        return self._get_scope_values(cache_keys, values)
+
+    async def aget_values(self, keys):
+        cache = self.get_cache()
+        cache_keys = {self._get_scope_cache_key(key): key for key in keys}
+        try:
+            values = await self.circuit_breaker.acall(cache.aget_many, list(cache_keys))
+        except Exception:
+            # already logged (rate-limited) by the circuit breaker
+            fallback_value = settings.MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE
+            return dict.fromkeys(keys, fallback_value)
+        return self._get_scope_values(cache_keys, values)
+
+    def set_values(self, mapping):
+        values = self._get_scope_cache_values(mapping)
+        cache = self.get_cache()
+        try:
+            self.circuit_breaker.write(cache.set_many, values, None)
+        except Exception as error:
+            logger.warning(
+                "The following unexpected exception has been raised "
+                "while trying to set the maintenance mode scopes cache keys."
+                f"\nException: {error}"
+            )
+
+    async def aset_values(self, mapping):
+        values = self._get_scope_cache_values(mapping)
+        cache = self.get_cache()
+        try:
+            await self.circuit_breaker.awrite(cache.aset_many, values, None)
+        except Exception as error:
+            logger.warning(
+                "The following unexpected exception has been raised "
+                "while trying to set the maintenance mode scopes cache keys."
+                f"\nException: {error}"
+            )
+
+    def _get_hosts_cache_keys(self):
+        return (self.hosts_cache_key, f"{self.hosts_cache_key}:version")
+
+    def _get_cache_hosts(self, cache_name, cache):
+        hosts_key, hosts_version_key = self._get_hosts_cache_keys()
+        version = cache.get(hosts_version_key)
+
+        def load():
+            values = cache.get_many([hosts_version_key, hosts_key])
+            return (cache_name, values.get(hosts_version_key)), values.get(hosts_key)
+
+        return self._get_versioned_hosts(
+            None if version is None else (cache_name, version), load
+        )
+
+    async def _aget_cache_hosts(self, cache_name, cache):
+        hosts_key, hosts_version_key = self._get_hosts_cache_keys()
+        version = await cache.aget(hosts_version_key)
+        if version is None:
+            self._hosts_state = None
+            return frozenset()
+        hosts = self._get_kept_hosts((cache_name, version))
+        if hosts is None:
+            values = await cache.aget_many([hosts_version_key, hosts_key])
+            hosts = self._keep_hosts(
+                (cache_name, values.get(hosts_version_key)), values.get(hosts_key)
+            )
+        return hosts
+
+    def get_hosts(self):
+        try:
+            return self._get_hosts_or_last(
+                self._get_cache_hosts, self.get_cache_name(), self.get_cache()
+            )
+        except Exception:
+            # already logged (rate-limited) by the circuit breaker
+            return frozenset()
+
+    async def aget_hosts(self):
+        try:
+            return await self.circuit_breaker.acall(
+                self._aget_cache_hosts, self.get_cache_name(), self.get_cache()
+            )
+        except Exception:
+            # already logged (rate-limited) by the circuit breaker
+            hosts = self._get_last_hosts()
+            return frozenset() if hosts is None else hosts
+
+    def update_hosts(self, add=(), remove=()):
+        # the current hosts must be read from the cache, never from a fallback
+        hosts = self.circuit_breaker.call(
+            self._get_cache_hosts, self.get_cache_name(), self.get_cache()
+        )
+        self.set_hosts((hosts | frozenset(add)) - frozenset(remove))
+
+    async def aupdate_hosts(self, add=(), remove=()):
+        hosts = await self.circuit_breaker.acall(
+            self._aget_cache_hosts, self.get_cache_name(), self.get_cache()
+        )
+        await self.aset_hosts((hosts | frozenset(add)) - frozenset(remove))
+
+    def _get_hosts_cache_values(self, hosts):
+        hosts_key, hosts_version_key = self._get_hosts_cache_keys()
+        return {
+            hosts_key: self.from_hosts_to_str_value(hosts),
+            hosts_version_key: time.time_ns(),
+        }
+
+    def set_hosts(self, hosts):
+        values = self._get_hosts_cache_values(hosts)
+        self.circuit_breaker.write(self.get_cache().set_many, values, None)
+
+    async def aset_hosts(self, hosts):
+        values = self._get_hosts_cache_values(hosts)
+        await self.circuit_breaker.awrite(self.get_cache().aset_many, values, None)
 
     def set_value(self, value):
         value = self.from_state_to_str_value(value)
         cache = self.get_cache()
         try:
-            cache.set("maintenance_mode", value, None)
+            self._write_cache_value(cache, value)
         except Exception as error:
             logger.warning(
                 "The following unexpected exception has been raised "
                 "while trying to set the maintenance mode cache key."
                 f"\nException: {error}"
             )
+
+    def set_versioned_value(self, value, version):
+        # errors are not swallowed, the write must not be acknowledged
+        value = self.from_state_to_str_value(value)
+        self._write_cache_value(self.get_cache(), value, version)
+
+    def _write_cache_value(self, cache, value, version=None):
+        self._state = None
+        self.circuit_breaker.write(self._set_cache_value, cache, value, version)
+
+
+class DatabaseBackend(AbstractStateBackend):
+    """
+    django-maintenance-mode backend which uses the database
+    ('maintenance_mode' must be in INSTALLED_APPS and migrated).
+    The last read state is kept in memory and revalidated at most once every
+    'settings.MAINTENANCE_MODE_DATABASE_BACKEND_CHECK_INTERVAL' seconds
+    with a primary key query of the version only, the value is read
+    (and parsed) again only when the version changes.
+    """
+
+    state_key = "maintenance_mode"
+    # not a scope key, so that it can't collide with a scope named "hosts"
+    hosts_state_key = "maintenance_mode_hosts"
+
+    # the database calls are limited by a statement timeout instead
+    circuit_breaker_thread_timeout = False
+
+    def __init__(self):
+        super().__init__()
+        self._state = None
+
+    @staticmethod
+    def get_model():
+        # deferred import because models can't be imported before the apps registry
+        from maintenance_mode.models import State
+
+        return State
+
+    @contextmanager
+    def _statement_timeout(self):
+        # the statement timeout is set only for the current transaction,
+        # it is supported by PostgreSQL only, with other databases
+        # the calls are limited by the connection options (eg. "read_timeout");
+        # it is not set inside a caller's transaction, since it would last
+        # until the end of it and apply to the caller's own queries too
+        timeout = settings.MAINTENANCE_MODE_STATE_BACKEND_TIMEOUT
+        using = router.db_for_read(self.get_model())
+        connection = connections[using]
+        if (
+            not timeout
+            or connection.vendor != "postgresql"
+            or connection.in_atomic_block
+        ):
+            yield
+            return
+        with transaction.atomic(using=using):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('statement_timeout', %s, true)",
+                    [str(max(1, int(timeout * 1000)))],
+                )
+            yield
+
+    def _get_db_state(self):
+        # (version, value, checked_at)
+        state = self._state
+        now = time.monotonic()
+        check_interval = settings.MAINTENANCE_MODE_DATABASE_BACKEND_CHECK_INTERVAL
+        if state is not None and check_interval and now - state[2] < check_interval:
+            return state[:2]
+        queryset = self.get_model().objects.filter(pk=self.state_key)
+        with self._statement_timeout():
+            if state is not None:
+                version = queryset.values_list("version", flat=True).first()
+                if version == state[0]:
+                    self._state = (version, state[1], now)
+                    return state[:2]
+            row = queryset.values_list("version", "value").first()
+        if row is None:
+            version, value = None, None
+        else:
+            version, value = row
+            value = self.from_str_to_state_value(value)
+        self._state = (version, value, now)
+        return (version, value)
+
+    def _set_db_value(self, value, version=None, state_key=None):
+        model = self.get_model()
+        state_key = state_key or self.state_key
+        new_version = F("version") + 1 if version is None else version
+        updated = model.objects.filter(pk=state_key).update(
+            value=value, version=new_version
+        )
+        if not updated:
+            try:
+                with transaction.atomic(using=router.db_for_write(model)):
+                    model.objects.create(
+                        key=state_key, value=value, version=version or 1
+                    )
+            except IntegrityError:
+                # created concurrently in the meanwhile
+                model.objects.filter(pk=state_key).update(
+                    value=value, version=new_version
+                )
+
+    def _get_scope_state_key(self, key):
+        return f"{self.state_key}:{key}"
+
+    def _get_db_values(self, state_keys):
+        with self._statement_timeout():
+            return list(
+                self.get_model()
+                .objects.filter(pk__in=state_keys)
+                .values_list("key", "value")
+            )
+
+    def _set_db_values(self, mapping):
+        model = self.get_model()
+        with transaction.atomic(using=router.db_for_write(model)):
+            for key, value in mapping.items():
+                self._set_db_value(value, state_key=self._get_scope_state_key(key))
+
+    def get_values(self, keys):
+        state_keys = {self._get_scope_state_key(key): key for key in keys}
+        rows = self.circuit_breaker.call(self._get_db_values, list(state_keys))
+        return {
+            state_keys[state_key]: self.from_str_to_state_value(value)
+            for state_key, value in rows
+        }
+
+    def set_values(self, mapping):
+        mapping = {
+            key: self.from_state_to_str_value(value) for key, value in mapping.items()
+        }
+        self.circuit_breaker.write(self._set_db_values, mapping)
+
+    def _get_db_hosts(self):
+        queryset = self.get_model().objects.filter(pk=self.hosts_state_key)
+        with self._statement_timeout():
+            return self._get_versioned_hosts(
+                queryset.values_list("version", flat=True).first(),
+                lambda: queryset.values_list("version", "value").first() or (None, ""),
+            )
+
+    def get_hosts(self):
+        return self._get_hosts_or_last(self._get_db_hosts)
+
+    def _update_db_hosts(self, add, remove):
+        model = self.get_model()
+        state_key = self.hosts_state_key
+        with transaction.atomic(using=router.db_for_write(model)):
+            value = (
+                model.objects.select_for_update()
+                .filter(pk=state_key)
+                .values_list("value", flat=True)
+                .first()
+            )
+            hosts = self.from_str_to_hosts_value(value or "")
+            hosts = (hosts | frozenset(add)) - frozenset(remove)
+            self._set_db_value(self.from_hosts_to_str_value(hosts), state_key=state_key)
+
+    def update_hosts(self, add=(), remove=()):
+        # the row is locked, concurrent updates are serialized
+        self.circuit_breaker.write(self._update_db_hosts, add, remove)
+
+    def set_hosts(self, hosts):
+        self.circuit_breaker.write(
+            self._set_db_value,
+            self.from_hosts_to_str_value(hosts),
+            state_key=self.hosts_state_key,
+        )
+
+    def _read_db_state(self):
+        version, value = self.circuit_breaker.read(self._get_db_state)
+        return (version, dict(value) if isinstance(value, dict) else value)
+
+    def lookup_value(self):
+        return self._read_db_state()[1]
+
+    def get_value(self):
+        value = self.lookup_value()
+        return False if value is None else value
+
+    def get_versioned_value(self):
+        version, value = self._read_db_state()
+        return (version, False if value is None else value)
+
+    def set_value(self, value):
+        value = self.from_state_to_str_value(value)
+        self._state = None
+        self.circuit_breaker.write(self._set_db_value, value)
+
+    def set_versioned_value(self, value, version):
+        value = self.from_state_to_str_value(value)
+        self._state = None
+        self.circuit_breaker.write(self._set_db_value, value, version)
+
+
+class MemoryBackend(AbstractStateBackend):
+    """
+    django-maintenance-mode backend which keeps the state in the process memory,
+    it is meant to be used as the first tier of ChainedBackend
+    (the state is not shared with the other processes).
+    """
+
+    process_local = True
+
+    def __init__(self):
+        super().__init__()
+        self._value = None
+        self._values = {}
+        self._hosts = frozenset()
+
+    def lookup_value(self):
+        value = self._value
+        return dict(value) if isinstance(value, dict) else value
+
+    def get_value(self):
+        value = self.lookup_value()
+        return False if value is None else value
+
+    def set_value(self, value):
+        # validate the value as the other backends do
+        self.from_state_to_str_value(value)
+        self._value = dict(value) if isinstance(value, dict) else bool(value)
+
+    def get_values(self, keys):
+        return self.copy_state_values(self._values, keys)
+
+    def set_values(self, mapping):
+        values = dict(self._values)
+        for key, value in mapping.items():
+            self.from_state_to_str_value(value)
+            values[key] = dict(value) if isinstance(value, dict) else bool(value)
+        self._values = values
+
+    def get_hosts(self):
+        return self._hosts
+
+    def set_hosts(self, hosts):
+        self._hosts = frozenset(hosts)
+
+    def update_hosts(self, add=(), remove=()):
+        self._hosts = (self._hosts | frozenset(add)) - frozenset(remove)
+
+    async def aget_value(self):
+        return self.get_value()
+
+    async def aset_value(self, value):
+        self.set_value(value)
+
+    def close(self):
+        self._value = None
+        self._values = {}
+        self._hosts = frozenset()
+
+
+class ChainedBackend(AbstractStateBackend):
+    """
+    django-maintenance-mode backend which chains other backends in read tiers
+    ('settings.MAINTENANCE_MODE_STATE_BACKEND_CHAIN'), from the fastest one
+    to the durable one (the last one): the state is read from the first tier
+    which has it and copied to the faster tiers (backfill), and it is written
+    to all the tiers (starting from the last one).
+    The state copied to a process-local tier (eg. MemoryBackend) is considered
+    valid for the tier 'TIMEOUT' seconds, then it is read again from the next tiers.
+    Shared tiers (eg. CacheBackend) are kept up to date by the writes and they are
+    backfilled only when they miss the state (eg. evicted), so that a newer state
+    written by another process is never overwritten by an older one.
+    Scoped and per-host states are read from and written to the last tier only.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # (chain setting, [(backend, timeout), ...], [valid until, ...])
+        self._chain = None
+
+    def _get_chain(self):
+        chain_setting = settings.MAINTENANCE_MODE_STATE_BACKEND_CHAIN
+        chain = self._chain
+        if chain is not None and chain[0] is chain_setting:
+            return chain
+        if not chain_setting:
+            raise ImproperlyConfigured(
+                "ChainedBackend requires "
+                "'settings.MAINTENANCE_MODE_STATE_BACKEND_CHAIN' to be set."
+            )
+        # deferred import because core depends on this module
+        from maintenance_mode.core import get_maintenance_mode_backend
+
+        tiers = []
+        for index, tier in enumerate(chain_setting):
+            backend = get_maintenance_mode_backend(tier["BACKEND"])
+            if isinstance(backend, ChainedBackend):
+                raise ImproperlyConfigured(
+                    "ChainedBackend can't be a tier of "
+                    "'settings.MAINTENANCE_MODE_STATE_BACKEND_CHAIN'."
+                )
+            # the state copied to the faster tiers expires by default
+            default_timeout = None if index == len(chain_setting) - 1 else 60
+            tiers.append((backend, tier.get("TIMEOUT", default_timeout)))
+        chain = (chain_setting, tiers, [float("-inf")] * len(tiers))
+        self._chain = chain
+        return chain
+
+    def _set_tier_valid(self, valid_until, index, timeout, now):
+        valid_until[index] = float("inf") if timeout is None else now + timeout
+
+    def lookup_value(self):
+        _, tiers, valid_until = self._get_chain()
+        now = time.monotonic()
+        last_index = len(tiers) - 1
+        value = None
+        # the upper tiers which can be backfilled
+        backfill_indexes = []
+        for index, (backend, timeout) in enumerate(tiers):
+            if backend.process_local:
+                backfill_indexes.append(index)
+                if timeout is not None and now >= valid_until[index]:
+                    continue
+            try:
+                value = backend.lookup_value()
+            except Exception:
+                if index == last_index:
+                    raise
+                # already logged by the tier backend (circuit breaker)
+                continue
+            if value is not None:
+                break
+            if not backend.process_local:
+                backfill_indexes.append(index)
+        if value is None:
+            value = False
+        upper_indexes = [
+            upper_index for upper_index in backfill_indexes if upper_index < index
+        ]
+        self._backfill_tiers(value, upper_indexes, now)
+        return dict(value) if isinstance(value, dict) else value
+
+    def _backfill_tiers(self, value, indexes, now):
+        _, tiers, valid_until = self._get_chain()
+        for index in indexes:
+            backend, timeout = tiers[index]
+            try:
+                backend.set_value(value)
+            except Exception:
+                continue
+            self._set_tier_valid(valid_until, index, timeout, now)
+
+    def get_value(self):
+        return self.lookup_value()
+
+    def set_value(self, value):
+        _, tiers, valid_until = self._get_chain()
+        # the durable tier first, so that faster tiers never have unsaved states
+        for index in reversed(range(len(tiers))):
+            backend, timeout = tiers[index]
+            valid_until[index] = float("-inf")
+            backend.set_value(value)
+            self._set_tier_valid(valid_until, index, timeout, time.monotonic())
+
+    def supports_scopes(self):
+        _, tiers, _ = self._get_chain()
+        return tiers[-1][0].supports_scopes()
+
+    def supports_hosts(self):
+        _, tiers, _ = self._get_chain()
+        return tiers[-1][0].supports_hosts()
+
+    def get_values(self, keys):
+        # scoped states are kept only by the durable tier
+        _, tiers, _ = self._get_chain()
+        return tiers[-1][0].get_values(keys)
+
+    def set_values(self, mapping):
+        _, tiers, _ = self._get_chain()
+        tiers[-1][0].set_values(mapping)
+
+    def get_hosts(self):
+        _, tiers, _ = self._get_chain()
+        return tiers[-1][0].get_hosts()
+
+    def set_hosts(self, hosts):
+        _, tiers, _ = self._get_chain()
+        tiers[-1][0].set_hosts(hosts)
+
+    def update_hosts(self, add=(), remove=()):
+        _, tiers, _ = self._get_chain()
+        tiers[-1][0].update_hosts(add, remove)
+
+
+class ReplicatedBackend(AbstractStateBackend):
+    """
+    django-maintenance-mode backend which replicates the state to multiple backends
+    ('settings.MAINTENANCE_MODE_STATE_BACKEND_REPLICAS') called concurrently:
+    a write succeeds when acknowledged by the write quorum of replicas,
+    a read returns the highest versioned value among the read quorum of replicas.
+    The version of each write is its timestamp (in nanoseconds),
+    so the clocks of the writing hosts are expected to be synchronized.
+    The quorum is awaited at most
+    'settings.MAINTENANCE_MODE_STATE_BACKEND_REPLICA_TIMEOUT' seconds,
+    the calls still pending are cancelled once the quorum is reached.
+    """
+
+    # the thread pool has this number of threads for each replica,
+    # so that concurrent calls (eg. threaded workers) aren't queued
+    # behind each other or behind a replica which hangs
+    max_concurrent_calls = 8
+
+    def __init__(self):
+        super().__init__()
+        # (replicas setting, [backend, ...])
+        self._replicas = None
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._version = 0
+
+    def _get_replicas(self):
+        replicas_setting = settings.MAINTENANCE_MODE_STATE_BACKEND_REPLICAS
+        replicas = self._replicas
+        if replicas is not None and replicas[0] is replicas_setting:
+            return replicas[1]
+        if not replicas_setting:
+            raise ImproperlyConfigured(
+                "ReplicatedBackend requires "
+                "'settings.MAINTENANCE_MODE_STATE_BACKEND_REPLICAS' to be set."
+            )
+        # deferred import because core depends on this module
+        from maintenance_mode.core import get_maintenance_mode_backend
+
+        backends = []
+        for backend_path in replicas_setting:
+            backend = get_maintenance_mode_backend(backend_path)
+            if isinstance(backend, ReplicatedBackend):
+                raise ImproperlyConfigured(
+                    "ReplicatedBackend can't be a replica of "
+                    "'settings.MAINTENANCE_MODE_STATE_BACKEND_REPLICAS'."
+                )
+            backends.append(backend)
+        self._replicas = (replicas_setting, backends)
+        return backends
+
+    @staticmethod
+    def _get_quorum(setting_name, replicas_count):
+        quorum = getattr(settings, setting_name)
+        if quorum is None:
+            # majority
+            return replicas_count // 2 + 1
+        if not 1 <= quorum <= replicas_count:
+            raise ImproperlyConfigured(
+                f"settings.{setting_name} must be between 1 "
+                f"and the number of replicas ({replicas_count})."
+            )
+        return quorum
+
+    def _get_executor(self, max_workers):
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._executor_lock:
+                # the executor threads don't survive fork()
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max_workers,
+                        thread_name_prefix="maintenance-mode-replica",
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    def _call_replicas(self, func, quorum_setting_name):
+        """
+        Call func(replica) concurrently for all the replicas and return
+        the results as soon as the quorum of replicas has succeeded.
+        """
+        replicas = self._get_replicas()
+        quorum = self._get_quorum(quorum_setting_name, len(replicas))
+        timeout = settings.MAINTENANCE_MODE_STATE_BACKEND_REPLICA_TIMEOUT
+        executor = self._get_executor(len(replicas) * self.max_concurrent_calls)
+        futures = [
+            executor.submit(call_closing_connections, func, replica)
+            for replica in replicas
+        ]
+        try:
+            return self._wait_for_quorum(futures, quorum, timeout)
+        finally:
+            # the calls not started yet are not needed anymore
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def _wait_for_quorum(futures, quorum, timeout):
+        results = []
+        failures = 0
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    results.append(future.result())
+                except Exception as error:
+                    failures += 1
+                    if len(futures) - failures < quorum:
+                        raise OSError(
+                            f"Quorum not reached, {failures} of {len(futures)} "
+                            f"replicas failed ({quorum} required).\nException: {error}"
+                        ) from error
+                    continue
+                if len(results) >= quorum:
+                    return results
+        except concurrent.futures.TimeoutError as error:
+            raise TimeoutError(
+                f"Quorum not reached, {len(results)} of {len(futures)} replicas "
+                f"succeeded within {timeout} seconds ({quorum} required)."
+            ) from error
+        return results
+
+    def get_versioned_value(self):
+        results = self._call_replicas(
+            lambda replica: replica.get_versioned_value(),
+            "MAINTENANCE_MODE_STATE_BACKEND_READ_QUORUM",
+        )
+        version, value = max(
+            results, key=lambda result: -1 if result[0] is None else result[0]
+        )
+        if version is not None and version > self._version:
+            self._version = version
+        return (version, value)
+
+    def get_value(self):
+        return self.get_versioned_value()[1]
+
+    def set_versioned_value(self, value, version):
+        # validate the value before reaching the replicas
+        self.from_state_to_str_value(value)
+        if version > self._version:
+            self._version = version
+        self._call_replicas(
+            lambda replica: replica.set_versioned_value(value, version),
+            "MAINTENANCE_MODE_STATE_BACKEND_WRITE_QUORUM",
+        )
+
+    def set_value(self, value):
+        version = max(time.time_ns(), self._version + 1)
+        self.set_versioned_value(value, version)
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,235 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+
+from maintenance_mode.utils import (
+    RateLimitedLog,
+    call_closing_connections,
+    get_executor,
+)
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CircuitBreakerOpenError(OSError):
+    """
+    Raised when a call is refused because the circuit breaker is open.
+    """
+
+    pass
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for the state backends calls.
+    After 'failure_threshold' consecutive failures the breaker opens
+    and calls are refused without reaching the backend, after 'retry_interval'
+    seconds a single probe call is allowed (half-open): if it succeeds the breaker
+    closes, otherwise the retry interval is doubled (up to 'max_retry_interval').
+    Calls can be limited to 'timeout' seconds, and failures are logged
+    at most once every 'log_interval' seconds (with the suppressed ones count).
+    """
+
+    # configuration / data errors, they don't tell anything about availability
+    ignored_exceptions = (ImproperlyConfigured, TypeError, ValueError)
+
+    def __init__(
+        self,
+        name,
+        failure_threshold=5,
+        retry_interval=1,
+        max_retry_interval=60,
+        timeout=None,
+        log_interval=60,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.timeout = timeout
+        self.log_interval = log_interval
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._probing = False
+        self._opened_until = 0.0
+        self._current_retry_interval = retry_interval
+        self._last_value = _MISSING
+        self._log = RateLimitedLog(logger, log_interval)
+
+    @property
+    def closed(self):
+        return self._failures < self.failure_threshold
+
+    def _acquire(self):
+        if self._failures < self.failure_threshold:
+            return True
+        with self._lock:
+            if self._failures < self.failure_threshold:
+                return True
+            if not self._probing and time.monotonic() >= self._opened_until:
+                # half-open, allow a single probe call
+                self._probing = True
+                return True
+            return False
+
+    def _on_success(self):
+        if not self._failures and not self._probing:
+            return
+        with self._lock:
+            recovered = self._failures >= self.failure_threshold
+            self._failures = 0
+            self._probing = False
+            self._current_retry_interval = self.retry_interval
+        if recovered:
+            logger.warning(f"The {self.name} state backend has recovered.")
+
+    def _on_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            if self._probing:
+                self._probing = False
+                self._current_retry_interval = min(
+                    self._current_retry_interval * 2, self.max_retry_interval
+                )
+            if self._failures >= self.failure_threshold:
+                self._opened_until = time.monotonic() + self._current_retry_interval
+        self._log.warning(
+            "The following unexpected exception has been raised "
+            f"by the {self.name} state backend."
+            f"\nException: {error}"
+        )
+
+    def _on_ignored_failure(self):
+        # a probe failed for another reason, the next one waits the retry interval
+        if not self._probing:
+            return
+        with self._lock:
+            if self._probing:
+                self._probing = False
+                self._opened_until = time.monotonic() + self._current_retry_interval
+
+    def _call_with_timeout(self, func, args, kwargs):
+        if not self.timeout:
+            return func(*args, **kwargs)
+        future = get_executor().submit(call_closing_connections, func, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError as error:
+            future.cancel()
+            raise TimeoutError(
+                f"The {self.name} state backend call "
+                f"timed out after {self.timeout} seconds."
+            ) from error
+
+    def _raise_if_open(self):
+        if not self._acquire():
+            raise CircuitBreakerOpenError(
+                f"The {self.name} state backend circuit breaker is open."
+            )
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call func through the circuit breaker,
+        raises CircuitBreakerOpenError if the breaker is open.
+        """
+        self._raise_if_open()
+        return self._call(func, args, kwargs)
+
+    def _call(self, func, args, kwargs):
+        try:
+            result = self._call_with_timeout(func, args, kwargs)
+        except self.ignored_exceptions:
+            self._on_ignored_failure()
+            raise
+        except Exception as error:
+            self._on_failure(error)
+            raise
+        self._on_success()
+        return result
+
+    async def _acall_with_timeout(self, func, args, kwargs):
+        if not self.timeout:
+            return await func(*args, **kwargs)
+        try:
+            return await asyncio.wait_for(func(*args, **kwargs), self.timeout)
+        except asyncio.TimeoutError as error:
+            raise TimeoutError(
+                f"The {self.name} state backend call "
+                f"timed out after {self.timeout} seconds."
+            ) from error
+
+    async def _acall(self, func, args, kwargs):
+        try:
+            result = await self._acall_with_timeout(func, args, kwargs)
+        except self.ignored_exceptions:
+            self._on_ignored_failure()
+            raise
+        except Exception as error:
+            self._on_failure(error)
+            raise
+        self._on_success()
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        """
+        Async version of call(), func must be a coroutine function.
+        """
+        self._raise_if_open()
+        return await self._acall(func, args, kwargs)
+
+    def _get_last_value(self):
+        value = self._last_value
+        if value is _MISSING:
+            return False, None
+        return True, dict(value) if isinstance(value, dict) else value
+
+    def read(self, func, *args, **kwargs):
+        """
+        Call func through the circuit breaker and return its result,
+        while the breaker is open the last known good result is returned.
+        """
+        try:
+            value = self.call(func, *args, **kwargs)
+        except CircuitBreakerOpenError:
+            found, value = self._get_last_value()
+            if not found:
+                raise
+            return value
+        self._last_value = value
+        return value
+
+    async def aread(self, func, *args, **kwargs):
+        """
+        Async version of read(), func must be a coroutine function.
+        """
+        try:
+            value = await self.acall(func, *args, **kwargs)
+        except CircuitBreakerOpenError:
+            found, value = self._get_last_value()
+            if not found:
+                raise
+            return value
+        self._last_value = value
+        return value
+
+    def write(self, func, *args, **kwargs):
+        """
+        Call func through the circuit breaker and discard the last known good result.
+        Writes are explicit and rare, so they are never refused:
+        they are recorded as any other call and a successful one closes the breaker.
+        """
+        self._last_value = _MISSING
+        return self._call(func, args, kwargs)
+
+    async def awrite(self, func, *args, **kwargs):
+        """
+        Async version of write(), func must be a coroutine function.
+        """
+        self._last_value = _MISSING
+        return await self._acall(func, args, kwargs)
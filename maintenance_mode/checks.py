@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.checks import Error, register
+from django.core.exceptions import ImproperlyConfigured
+
+from maintenance_mode.core import get_maintenance_mode_backend
+
+
+@register()
+def check_maintenance_mode_scopes(app_configs, **kwargs):
+    """
+    Check that the state backend supports scoped states
+    if 'settings.MAINTENANCE_MODE_SCOPES' is set.
+    """
+    if not settings.MAINTENANCE_MODE_SCOPES:
+        return []
+    try:
+        supported = get_maintenance_mode_backend().supports_scopes()
+    except ImproperlyConfigured:
+        # reported when the backend is used
+        return []
+    if supported:
+        return []
+    return [
+        Error(
+            f"{settings.MAINTENANCE_MODE_STATE_BACKEND} doesn't support scoped states.",
+            hint=(
+                "Use a state backend which supports scoped states "
+                "or unset 'settings.MAINTENANCE_MODE_SCOPES'."
+            ),
+            id="maintenance_mode.E001",
+        )
+    ]
+
+
+@register()
+def check_maintenance_mode_per_host(app_configs, **kwargs):
+    """
+    Check that the state backend supports per-host states
+    if 'settings.MAINTENANCE_MODE_PER_HOST' is True.
+    """
+    if not settings.MAINTENANCE_MODE_PER_HOST:
+        return []
+    try:
+        supported = get_maintenance_mode_backend().supports_hosts()
+    except ImproperlyConfigured:
+        # reported when the backend is used
+        return []
+    if supported:
+        return []
+    return [
+        Error(
+            f"{settings.MAINTENANCE_MODE_STATE_BACKEND} "
+            "doesn't support per-host states.",
+            hint=(
+                "Use a state backend which supports per-host states "
+                "or set 'settings.MAINTENANCE_MODE_PER_HOST' to False."
+            ),
+            id="maintenance_mode.E002",
+        )
+    ]
@@ -1,31 +1,324 @@
+import threading
 from contextlib import ContextDecorator
+from functools import lru_cache
 
 from django.conf import settings
-from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import DisallowedHost, ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http.request import split_domain_port
 from django.utils.module_loading import import_string
 
 from maintenance_mode.backends import AbstractStateBackend
+from maintenance_mode.state import (
+    MaintenanceModeSchedule,
+    MaintenanceModeState,
+    StateCache,
+    StateRefresher,
+)
 from maintenance_mode.utils import get_now_datetime, parse_aware_datetime
 
+# settings (other than 'MAINTENANCE_MODE_*' ones)
+# which require the state backends to be recreated when changed
+BACKENDS_SETTINGS = {
+    "CACHES",
+    "DATABASES",
+    "MEDIA_ROOT",
+    "STATIC_ROOT",
+    "STORAGES",
+}
 
-def get_maintenance_mode_backend():
+_backends = {}
+_backends_lock = threading.RLock()
+_state_cache = StateCache()
+_state_refresher = StateRefresher()
+_scopes_index = None
+_scopes_state_cache = StateCache()
+_hosts_state_cache = StateCache()
+
+
+def _get_maintenance_mode_backend_class(backend_path):
     try:
-        backend_class = import_string(settings.MAINTENANCE_MODE_STATE_BACKEND)
-        if (
-            issubclass(backend_class, AbstractStateBackend)
-            and backend_class != AbstractStateBackend
-        ):
-            backend = backend_class()
-            return backend
-        else:
-            raise ImproperlyConfigured(
-                "backend doesn't extend "
-                "'maintenance_mode.backends.AbstractStateBackend' class."
-            )
+        backend_class = import_string(backend_path)
     except ImportError as error:
         raise ImproperlyConfigured(
             "backend not found, check 'settings.MAINTENANCE_MODE_STATE_BACKEND' path."
         ) from error
+    if not (
+        isinstance(backend_class, type)
+        and issubclass(backend_class, AbstractStateBackend)
+        and backend_class != AbstractStateBackend
+    ):
+        raise ImproperlyConfigured(
+            "backend doesn't extend "
+            "'maintenance_mode.backends.AbstractStateBackend' class."
+        )
+    return backend_class
+
+
+def get_maintenance_mode_backend(backend_path=None):
+    """
+    Get the state backend instance for the given backend path
+    (by default 'settings.MAINTENANCE_MODE_STATE_BACKEND').
+    The backend class is resolved and validated only once,
+    then a single instance is shared (thread-safe) for each backend path.
+    """
+    if backend_path is None:
+        backend_path = settings.MAINTENANCE_MODE_STATE_BACKEND
+    backend = _backends.get(backend_path)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(backend_path)
+            if backend is None:
+                backend_class = _get_maintenance_mode_backend_class(backend_path)
+                backend = backend_class()
+                _backends[backend_path] = backend
+    return backend
+
+
+def clear_maintenance_mode_backends():
+    """
+    Discard the shared state backend instances,
+    they will be created again on the next access.
+    """
+    with _backends_lock:
+        backends = list(_backends.values())
+        _backends.clear()
+    for backend in backends:
+        backend.close()
+
+
+def _get_backend_value():
+    return get_maintenance_mode_backend().get_value()
+
+
+def _get_maintenance_mode_backend_value():
+    """
+    Get the state value from the backend, using the background refresher
+    if 'settings.MAINTENANCE_MODE_STATE_REFRESH_INTERVAL' is set,
+    or the process-local state cache
+    if 'settings.MAINTENANCE_MODE_STATE_CACHE_TIMEOUT' is set.
+    """
+    interval = settings.MAINTENANCE_MODE_STATE_REFRESH_INTERVAL
+    if interval:
+        return _state_refresher.get(
+            settings.MAINTENANCE_MODE_STATE_BACKEND,
+            _get_backend_value,
+            interval,
+            settings.MAINTENANCE_MODE_STATE_MAX_STALENESS,
+        )
+    timeout = settings.MAINTENANCE_MODE_STATE_CACHE_TIMEOUT
+    if not timeout:
+        return _get_backend_value()
+    return _state_cache.get(
+        settings.MAINTENANCE_MODE_STATE_BACKEND,
+        timeout,
+        _get_backend_value,
+    )
+
+
+async def _aget_maintenance_mode_backend_value():
+    """
+    Async version of '_get_maintenance_mode_backend_value'.
+    """
+    key = settings.MAINTENANCE_MODE_STATE_BACKEND
+    interval = settings.MAINTENANCE_MODE_STATE_REFRESH_INTERVAL
+    timeout = settings.MAINTENANCE_MODE_STATE_CACHE_TIMEOUT
+    if interval:
+        _state_refresher.watch(key, _get_backend_value, interval)
+        found, value = _state_refresher.lookup(
+            key, settings.MAINTENANCE_MODE_STATE_MAX_STALENESS
+        )
+        if found:
+            return value
+        generation = _state_refresher.generation
+        value = await get_maintenance_mode_backend().aget_value()
+        _state_refresher.store(key, value, generation)
+        return value
+    if not timeout:
+        return await get_maintenance_mode_backend().aget_value()
+    found, value = _state_cache.lookup(key)
+    if found:
+        return value
+    generation = _state_cache.generation
+    value = await get_maintenance_mode_backend().aget_value()
+    _state_cache.store(key, value, timeout, generation)
+    return value
+
+
+def _get_maintenance_mode_scopes_index():
+    """
+    Get the scopes index ({prefix: [scope, ...]}, prefix lengths),
+    it is rebuilt only when 'settings.MAINTENANCE_MODE_SCOPES' changes.
+    """
+    global _scopes_index
+    scopes = settings.MAINTENANCE_MODE_SCOPES
+    index = _scopes_index
+    if index is None or index[0] is not scopes:
+        prefixes = {}
+        for scope, scope_prefixes in scopes.items():
+            if isinstance(scope_prefixes, str):
+                scope_prefixes = [scope_prefixes]
+            for prefix in scope_prefixes:
+                prefixes.setdefault(prefix, []).append(scope)
+        # longest prefixes first, the most specific scopes win
+        lengths = sorted({len(prefix) for prefix in prefixes}, reverse=True)
+        index = (scopes, prefixes, lengths)
+        _scopes_index = index
+    return index[1], index[2]
+
+
+def get_maintenance_mode_scopes(path):
+    """
+    Get the scopes matching the given url path, the most specific first.
+    """
+    prefixes, lengths = _get_maintenance_mode_scopes_index()
+    scopes = []
+    for length in lengths:
+        if length <= len(path):
+            scopes.extend(prefixes.get(path[:length], ()))
+    return scopes
+
+
+def _validate_maintenance_mode_scope(scope):
+    if scope not in settings.MAINTENANCE_MODE_SCOPES:
+        raise ValueError(
+            f"scope argument value {scope!r} "
+            "is not defined in settings.MAINTENANCE_MODE_SCOPES"
+        )
+
+
+def _get_backend_scopes_values():
+    return get_maintenance_mode_backend().get_values(
+        list(settings.MAINTENANCE_MODE_SCOPES)
+    )
+
+
+def _get_maintenance_mode_states_timeout():
+    return (
+        settings.MAINTENANCE_MODE_STATE_CACHE_TIMEOUT
+        or settings.MAINTENANCE_MODE_STATE_REFRESH_INTERVAL
+    )
+
+
+def _get_maintenance_mode_scopes_values():
+    """
+    Get the values of all the scopes with a single backend call,
+    cached in the same way of the global state value.
+    """
+    timeout = _get_maintenance_mode_states_timeout()
+    if not timeout:
+        return _get_backend_scopes_values()
+    return _scopes_state_cache.get(
+        settings.MAINTENANCE_MODE_STATE_BACKEND,
+        timeout,
+        _get_backend_scopes_values,
+    )
+
+
+async def _aget_maintenance_mode_scopes_values():
+    """
+    Async version of '_get_maintenance_mode_scopes_values'.
+    """
+    backend = get_maintenance_mode_backend()
+    keys = list(settings.MAINTENANCE_MODE_SCOPES)
+    timeout = _get_maintenance_mode_states_timeout()
+    if not timeout:
+        return await backend.aget_values(keys)
+    key = settings.MAINTENANCE_MODE_STATE_BACKEND
+    found, values = _scopes_state_cache.lookup(key)
+    if found:
+        return values
+    generation = _scopes_state_cache.generation
+    values = await backend.aget_values(keys)
+    _scopes_state_cache.store(key, values, timeout, generation)
+    return values
+
+
+def _get_maintenance_mode_host(host):
+    # the host without port, lowercased
+    domain, _ = split_domain_port(host)
+    return domain or host.lower()
+
+
+def _get_maintenance_mode_request_host(request):
+    if not settings.MAINTENANCE_MODE_PER_HOST:
+        return None
+    try:
+        return _get_maintenance_mode_host(request.get_host())
+    except (AttributeError, DisallowedHost):
+        return None
+
+
+def _get_backend_hosts():
+    return get_maintenance_mode_backend().get_hosts()
+
+
+def _get_maintenance_mode_hosts():
+    """
+    Get the frozenset of the hosts in maintenance mode with a single backend call,
+    cached in the same way of the global state value.
+    """
+    timeout = _get_maintenance_mode_states_timeout()
+    if not timeout:
+        return _get_backend_hosts()
+    return _hosts_state_cache.get(
+        settings.MAINTENANCE_MODE_STATE_BACKEND,
+        timeout,
+        _get_backend_hosts,
+    )
+
+
+async def _aget_maintenance_mode_hosts():
+    """
+    Async version of '_get_maintenance_mode_hosts'.
+    """
+    backend = get_maintenance_mode_backend()
+    timeout = _get_maintenance_mode_states_timeout()
+    if not timeout:
+        return await backend.aget_hosts()
+    key = settings.MAINTENANCE_MODE_STATE_BACKEND
+    found, hosts = _hosts_state_cache.lookup(key)
+    if found:
+        return hosts
+    generation = _hosts_state_cache.generation
+    hosts = await backend.aget_hosts()
+    _hosts_state_cache.store(key, hosts, timeout, generation)
+    return hosts
+
+
+def clear_maintenance_mode_cache():
+    """
+    Invalidate the process-local state cache.
+    """
+    _state_cache.clear()
+    _state_refresher.clear()
+    _scopes_state_cache.clear()
+    _hosts_state_cache.clear()
+
+
+@receiver(setting_changed)
+def _clear_maintenance_mode_caches(setting, **kwargs):
+    if setting.startswith("MAINTENANCE_MODE_") or setting in BACKENDS_SETTINGS:
+        clear_maintenance_mode_backends()
+        clear_maintenance_mode_cache()
+        # restarted with the new settings on the next access
+        _state_refresher.stop()
+    if setting in {"TIME_ZONE", "USE_TZ"}:
+        # naive schedule datetimes depend on the current timezone
+        _get_maintenance_mode_schedule.cache_clear()
+
+
+@lru_cache(maxsize=32)
+def _get_maintenance_mode_schedule(start, end):
+    """
+    Compile a schedule state ({"start": ..., "end": ...}),
+    the datetimes are parsed only once for each schedule.
+    """
+    return MaintenanceModeSchedule.from_datetimes(
+        parse_aware_datetime(start),
+        parse_aware_datetime(end),
+    )
 
 
 def _get_maintenance_mode_by_schedule(state):
@@ -33,35 +326,154 @@ def _get_maintenance_mode_by_schedule(state):
     Evaluate a schedule state ({"start": ..., "end": ...})
     against the current datetime.
     """
-    start = parse_aware_datetime(state.get("start"))
-    end = parse_aware_datetime(state.get("end"))
-    now = get_now_datetime()
-    started = start is None or start <= now
-    ended = end is not None and end <= now
-    return started and not ended
+    schedule = _get_maintenance_mode_schedule(state.get("start"), state.get("end"))
+    return schedule.is_active()
 
 
-def get_maintenance_mode():
-    """
-    Get maintenance_mode state from state file.
-    """
+def _get_maintenance_mode_state_from_value(value, scope=None):
+    if isinstance(value, dict):
+        return MaintenanceModeState(
+            _get_maintenance_mode_by_schedule(value), value, scope=scope
+        )
+    return MaintenanceModeState(value, scope=scope)
+
+
+def _get_maintenance_mode_scopes_state(scopes, values):
+    # the first active scope state, if any
+    for scope in scopes:
+        if scope in values:
+            state = _get_maintenance_mode_state_from_value(values[scope], scope)
+            if state.value:
+                return state
+    return None
 
+
+def _get_maintenance_mode_state(path=None, host=None):
     # If maintenance mode is defined in settings, it has priority.
     if settings.MAINTENANCE_MODE is not None:
-        return settings.MAINTENANCE_MODE
+        return MaintenanceModeState(settings.MAINTENANCE_MODE)
 
-    backend = get_maintenance_mode_backend()
-    value = backend.get_value()
-    if isinstance(value, dict):
-        value = _get_maintenance_mode_by_schedule(value)
-    return value
+    value = _get_maintenance_mode_backend_value()
+    state = _get_maintenance_mode_state_from_value(value)
+    if state.value:
+        return state
+
+    if host is not None and host in _get_maintenance_mode_hosts():
+        return MaintenanceModeState(True)
+
+    if path is not None and settings.MAINTENANCE_MODE_SCOPES:
+        scopes = get_maintenance_mode_scopes(path)
+        if scopes:
+            values = _get_maintenance_mode_scopes_values()
+            state = _get_maintenance_mode_scopes_state(scopes, values) or state
+    return state
 
 
-def set_maintenance_mode(value, start=None, end=None):
+async def _aget_maintenance_mode_state(path=None, host=None):
+    # If maintenance mode is defined in settings, it has priority.
+    if settings.MAINTENANCE_MODE is not None:
+        return MaintenanceModeState(settings.MAINTENANCE_MODE)
+
+    value = await _aget_maintenance_mode_backend_value()
+    state = _get_maintenance_mode_state_from_value(value)
+    if state.value:
+        return state
+
+    if host is not None and host in await _aget_maintenance_mode_hosts():
+        return MaintenanceModeState(True)
+
+    if path is not None and settings.MAINTENANCE_MODE_SCOPES:
+        scopes = get_maintenance_mode_scopes(path)
+        if scopes:
+            values = await _aget_maintenance_mode_scopes_values()
+            state = _get_maintenance_mode_scopes_state(scopes, values) or state
+    return state
+
+
+def _get_maintenance_mode_scope_state(scope):
+    _validate_maintenance_mode_scope(scope)
+    if settings.MAINTENANCE_MODE is not None:
+        return MaintenanceModeState(settings.MAINTENANCE_MODE, scope=scope)
+    values = _get_maintenance_mode_scopes_values()
+    return _get_maintenance_mode_state_from_value(values.get(scope, False), scope)
+
+
+async def _aget_maintenance_mode_scope_state(scope):
+    _validate_maintenance_mode_scope(scope)
+    if settings.MAINTENANCE_MODE is not None:
+        return MaintenanceModeState(settings.MAINTENANCE_MODE, scope=scope)
+    values = await _aget_maintenance_mode_scopes_values()
+    return _get_maintenance_mode_state_from_value(values.get(scope, False), scope)
+
+
+def get_maintenance_mode_state(request=None, refresh=False):
     """
-    Set maintenance_mode state to state file,
-    optionally scheduled with start and/or end datetimes
-    (datetime objects or ISO 8601 strings).
+    Get maintenance_mode state snapshot (value, schedule, scope, evaluation timestamp).
+    If a request is given, the state is resolved once and attached to the request,
+    so that it is shared by the middleware, context processor and logging filter,
+    when the global state is off the request host and the scopes matching
+    the request path are checked.
+    """
+    if request is None:
+        return _get_maintenance_mode_state()
+    state = None if refresh else getattr(request, "_maintenance_mode_state", None)
+    if state is None:
+        state = _get_maintenance_mode_state(
+            getattr(request, "path_info", None),
+            _get_maintenance_mode_request_host(request),
+        )
+        request._maintenance_mode_state = state
+    return state
+
+
+async def aget_maintenance_mode_state(request=None, refresh=False):
+    """
+    Async version of 'get_maintenance_mode_state'.
+    """
+    if request is None:
+        return await _aget_maintenance_mode_state()
+    state = None if refresh else getattr(request, "_maintenance_mode_state", None)
+    if state is None:
+        state = await _aget_maintenance_mode_state(
+            getattr(request, "path_info", None),
+            _get_maintenance_mode_request_host(request),
+        )
+        request._maintenance_mode_state = state
+    return state
+
+
+def get_maintenance_mode(request=None, scope=None, host=None):
+    """
+    Get maintenance_mode state from state file,
+    if scope / host is given the state of the scope / host is returned.
+    """
+    if scope is not None:
+        return _get_maintenance_mode_scope_state(scope).value
+    if host is not None:
+        if settings.MAINTENANCE_MODE is not None:
+            return settings.MAINTENANCE_MODE
+        return _get_maintenance_mode_host(host) in _get_maintenance_mode_hosts()
+    return get_maintenance_mode_state(request).value
+
+
+async def aget_maintenance_mode(request=None, scope=None, host=None):
+    """
+    Async version of 'get_maintenance_mode'.
+    """
+    if scope is not None:
+        return (await _aget_maintenance_mode_scope_state(scope)).value
+    if host is not None:
+        if settings.MAINTENANCE_MODE is not None:
+            return settings.MAINTENANCE_MODE
+        hosts = await _aget_maintenance_mode_hosts()
+        return _get_maintenance_mode_host(host) in hosts
+    return (await aget_maintenance_mode_state(request)).value
+
+
+def _get_maintenance_mode_value(value, start=None, end=None):
+    """
+    Validate the arguments of 'set_maintenance_mode'
+    and return the state value to set to the backend.
     """
 
     # If maintenance mode is defined in settings, it can't be changed.
@@ -86,9 +498,62 @@ def set_maintenance_mode(value, start=None, end=None):
             "start": start.isoformat() if start else None,
             "end": end.isoformat() if end else None,
         }
+    return value
 
+
+def _validate_maintenance_mode_host(value, scope, host):
+    if scope is not None:
+        raise ValueError("scope and host arguments can't be used together")
+    if isinstance(value, dict):
+        raise ValueError("start / end arguments can't be used with host argument")
+    return _get_maintenance_mode_host(host)
+
+
+def set_maintenance_mode(value, start=None, end=None, scope=None, host=None):
+    """
+    Set maintenance_mode state to state file,
+    optionally scheduled with start and/or end datetimes
+    (datetime objects or ISO 8601 strings),
+    if scope / host is given only the state of the scope / host is set.
+    """
+    value = _get_maintenance_mode_value(value, start, end)
     backend = get_maintenance_mode_backend()
-    backend.set_value(value)
+    try:
+        if host is not None:
+            host = _validate_maintenance_mode_host(value, scope, host)
+            if value:
+                backend.update_hosts(add=[host])
+            else:
+                backend.update_hosts(remove=[host])
+        elif scope is not None:
+            _validate_maintenance_mode_scope(scope)
+            backend.set_values({scope: value})
+        else:
+            backend.set_value(value)
+    finally:
+        clear_maintenance_mode_cache()
+
+
+async def aset_maintenance_mode(value, start=None, end=None, scope=None, host=None):
+    """
+    Async version of 'set_maintenance_mode'.
+    """
+    value = _get_maintenance_mode_value(value, start, end)
+    backend = get_maintenance_mode_backend()
+    try:
+        if host is not None:
+            host = _validate_maintenance_mode_host(value, scope, host)
+            if value:
+                await backend.aupdate_hosts(add=[host])
+            else:
+                await backend.aupdate_hosts(remove=[host])
+        elif scope is not None:
+            _validate_maintenance_mode_scope(scope)
+            await backend.aset_values({scope: value})
+        else:
+            await backend.aset_value(value)
+    finally:
+        clear_maintenance_mode_cache()
 
 
 class override_maintenance_mode(ContextDecorator):
@@ -110,7 +575,10 @@ class override_maintenance_mode(ContextDecorator):
 
     def __exit__(self, exc_type, exc_value, traceback):
         backend = get_maintenance_mode_backend()
-        backend.set_value(self.old_value)
+        try:
+            backend.set_value(self.old_value)
+        finally:
+            clear_maintenance_mode_cache()
 
 
 class maintenance_mode_on(override_maintenance_mode):
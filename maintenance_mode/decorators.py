@@ -1,21 +1,39 @@
 from functools import wraps
 
-from maintenance_mode.http import get_maintenance_response
+from asgiref.sync import iscoroutinefunction
+
+from maintenance_mode.http import aget_maintenance_response, get_maintenance_response
 
 
 def force_maintenance_mode_off(view_func):
-    @wraps(view_func)
-    def wrapper(request, *args, **kwargs):
-        return view_func(request, *args, **kwargs)
+    if iscoroutinefunction(view_func):
+
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            return await view_func(request, *args, **kwargs)
+
+    else:
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return view_func(request, *args, **kwargs)
 
     wrapper.__dict__["force_maintenance_mode_off"] = True
     return wrapper
 
 
 def force_maintenance_mode_on(view_func):
-    @wraps(view_func)
-    def wrapper(request, *args, **kwargs):
-        return get_maintenance_response(request)
+    if iscoroutinefunction(view_func):
+
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            return await aget_maintenance_response(request)
+
+    else:
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return get_maintenance_response(request)
 
     wrapper.__dict__["force_maintenance_mode_on"] = True
     return wrapper
@@ -1,16 +1,18 @@
-import re
-import sys
-
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib.auth import logout
 from django.core.exceptions import ImproperlyConfigured
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
-from django.urls import NoReverseMatch, Resolver404, resolve, reverse
+from django.urls import Resolver404
 from django.utils.cache import add_never_cache_headers
 
-from maintenance_mode.core import get_maintenance_mode
-from maintenance_mode.utils import get_client_ip_address, import_function
+from maintenance_mode.core import (
+    aget_maintenance_mode_state,
+    get_maintenance_mode_state,
+)
+from maintenance_mode.matchers import get_forced_views_matcher
+from maintenance_mode.policy import get_maintenance_policy
+from maintenance_mode.utils import import_function
 
 
 def get_maintenance_response_context(request):
@@ -68,6 +70,14 @@ def get_maintenance_response(request):
     return response
 
 
+async def aget_maintenance_response(request):
+    """
+    Async version of 'get_maintenance_response'
+    (the response is rendered in a thread, it can use the database).
+    """
+    return await sync_to_async(get_maintenance_response)(request)
+
+
 def get_maintenance_html_response(request):
     """
     Return an HTML response for maintenance.
@@ -96,8 +106,10 @@ def get_maintenance_json_response(request):
 
 def _need_maintenance_from_view(request):
     try:
-        view_match = resolve(request.path)
-        view_func = view_match[0]
+        # only the paths which can match a forced view are resolved
+        view_func = get_forced_views_matcher().resolve(request.path)
+        if view_func is None:
+            return
         view_dict = view_func.__dict__
 
         view_force_maintenance_mode_off = view_dict.get(
@@ -118,141 +130,12 @@ def _need_maintenance_from_view(request):
         pass
 
 
-def _need_maintenance_from_url(request):
-    try:
-        url_off = reverse("maintenance_mode_off")
-        resolve(url_off)
-        if url_off == request.path_info:
-            return False
-    except NoReverseMatch:
-        # maintenance_mode.urls not added
-        pass
-
-
-def _need_maintenance_logout_user(user):
-    if not user.is_authenticated:
-        return False
-    logout_authenticated_user = settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER
-    logout_staff_user = settings.MAINTENANCE_MODE_LOGOUT_STAFF_USER
-    logout_superuser = settings.MAINTENANCE_MODE_LOGOUT_SUPERUSER
-    if user.is_superuser:
-        if logout_superuser is not None:
-            return logout_superuser
-        return logout_authenticated_user
-    if user.is_staff:
-        if logout_staff_user is not None:
-            return logout_staff_user
-        return logout_authenticated_user
-    return logout_authenticated_user
-
-
-def _get_maintenance_authenticated_user(request):
-    if settings.MAINTENANCE_MODE_GET_AUTHENTICATED_USER:
-        get_authenticated_user_func = import_function(
-            settings.MAINTENANCE_MODE_GET_AUTHENTICATED_USER,
-            "MAINTENANCE_MODE_GET_AUTHENTICATED_USER",
-        )
-        user = get_authenticated_user_func(request=request)
-        if user is not None:
-            return user
-    return getattr(request, "user", None)
-
-
-def _need_maintenance_ignore_users(request):
-    user = _get_maintenance_authenticated_user(request)
-    if user is None:
-        return
-
-    if _need_maintenance_logout_user(user):
-        logout(request)
-        user = request.user
-
-    if settings.MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER and user.is_anonymous:
-        return False
-
-    if settings.MAINTENANCE_MODE_IGNORE_AUTHENTICATED_USER and user.is_authenticated:
-        return False
-
-    if settings.MAINTENANCE_MODE_IGNORE_STAFF and user.is_staff:
-        return False
-
-    if settings.MAINTENANCE_MODE_IGNORE_SUPERUSER and user.is_superuser:
-        return False
-
-
-def _need_maintenance_ignore_admin_site(request):
-    if not settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE:
-        return
-
-    try:
-        request_path = request.path if request.path else ""
-        if not request_path.endswith("/"):
-            request_path += "/"
-
-        admin_url = reverse("admin:index")
-        if request_path.startswith(admin_url):
-            return False
-    except NoReverseMatch:
-        # admin.urls not added
-        pass
-
-
-def _need_maintenance_ignore_tests(request):
-    if not settings.MAINTENANCE_MODE_IGNORE_TESTS:
-        return
-
-    is_testing = False
-
-    if (len(sys.argv) > 0 and "runtests" in sys.argv[0]) or (
-        len(sys.argv) > 1 and sys.argv[1] == "test"
-    ):
-        # python runtests.py | python manage.py test | python
-        # setup.py test | django-admin.py test
-        is_testing = True
-
-    if is_testing:
-        return False
-
-
-def _need_maintenance_ignore_ip_addresses(request):
-    if not settings.MAINTENANCE_MODE_IGNORE_IP_ADDRESSES:
-        return
-
-    if settings.MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS:
-        get_client_ip_address_func = import_function(
-            settings.MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS,
-            "MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS",
-        )
-        client_ip_address = get_client_ip_address_func(request)
-    else:
-        client_ip_address = get_client_ip_address(request)
-
-    for ip_address in settings.MAINTENANCE_MODE_IGNORE_IP_ADDRESSES:
-        ip_address_re = re.compile(ip_address)
-        if ip_address_re.match(client_ip_address):
-            return False
-
-
-def _need_maintenance_ignore_urls(request):
-    if not settings.MAINTENANCE_MODE_IGNORE_URLS:
-        return
-
-    for url in settings.MAINTENANCE_MODE_IGNORE_URLS:
-        if not isinstance(url, re.Pattern):
-            url = str(url)
-        url_re = re.compile(url)
-        if url_re.match(request.path_info):
-            return False
-
-
-def _need_maintenance_redirects(request):
-    if not settings.MAINTENANCE_MODE_REDIRECT_URL:
-        return
-
-    redirect_url_re = re.compile(settings.MAINTENANCE_MODE_REDIRECT_URL)
-
-    if redirect_url_re.match(request.path_info):
-        return False
+def _need_maintenance_from_request(request):
+    """
+    Tells if the given request needs a maintenance response or not,
+    when maintenance mode is on.
+    """
+    return get_maintenance_policy().need_maintenance(request)
 
 
 def need_maintenance_response(request):
@@ -264,36 +147,28 @@ def need_maintenance_response(request):
     if isinstance(value, bool):
         return value
 
-    value = get_maintenance_mode()
+    # always resolve a fresh state snapshot for the request,
+    # it will be reused by the context processor and logging filter
+    value = get_maintenance_mode_state(request, refresh=True).value
     if not value:
         return value
 
-    value = _need_maintenance_from_url(request)
-    if isinstance(value, bool):
-        return value
+    return _need_maintenance_from_request(request)
 
-    value = _need_maintenance_ignore_users(request)
-    if isinstance(value, bool):
-        return value
-
-    value = _need_maintenance_ignore_admin_site(request)
-    if isinstance(value, bool):
-        return value
-
-    value = _need_maintenance_ignore_tests(request)
-    if isinstance(value, bool):
-        return value
 
-    value = _need_maintenance_ignore_ip_addresses(request)
-    if isinstance(value, bool):
-        return value
+async def aneed_maintenance_response(request):
+    """
+    Async version of 'need_maintenance_response', when maintenance mode is off
+    the event loop thread is never left.
+    """
 
-    value = _need_maintenance_ignore_urls(request)
+    value = _need_maintenance_from_view(request)
     if isinstance(value, bool):
         return value
 
-    value = _need_maintenance_redirects(request)
-    if isinstance(value, bool):
+    value = (await aget_maintenance_mode_state(request, refresh=True)).value
+    if not value:
         return value
 
-    return True
+    # the user checks can hit the database (session, user)
+    return await sync_to_async(_need_maintenance_from_request)(request)
@@ -1,6 +1,21 @@
+import os
+
 import fsutil
 
 
+def get_file_key(filepath):
+    """
+    Get a key that identifies the current version of the file
+    at the specified path (path, inode, modification time, size).
+    Returns None if the file doesn't exist.
+    """
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return (filepath, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
 def read_file(filepath, default_content=""):
     """
     Read file at the specified path.
@@ -1,5 +1,7 @@
 import logging
 
+from django.http import HttpRequest
+
 from maintenance_mode.core import get_maintenance_mode
 
 
@@ -14,6 +16,12 @@ class RequireNotMaintenanceMode503(logging.Filter):
         the given record has a status code of 503.
         """
         status_code = getattr(record, "status_code", None)
-        if get_maintenance_mode() and status_code == 503:
+        if status_code != 503:
+            return True
+        # reuse the maintenance mode state already resolved for the request
+        request = getattr(record, "request", None)
+        if not isinstance(request, HttpRequest):
+            request = None
+        if get_maintenance_mode(request):
             return False
         return True
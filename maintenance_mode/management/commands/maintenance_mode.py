@@ -15,37 +15,74 @@ class Command(BaseCommand):
         parser.add_argument("state")
         parser.add_argument("--start", dest="start", default=None)
         parser.add_argument("--end", dest="end", default=None)
+        parser.add_argument("--scope", dest="scope", default=None)
+        parser.add_argument("--host", dest="host", default=None)
         parser.add_argument("--interactive", dest="interactive", action="store_true")
 
-    def get_maintenance_mode(self):
+    def get_maintenance_mode(self, scope=None, host=None):
         try:
-            value = core.get_maintenance_mode()
+            value = core.get_maintenance_mode(scope=scope, host=host)
             return value
         except OSError as error:
             raise CommandError(
                 "Unable to read state file at: "
                 f"{settings.MAINTENANCE_MODE_STATE_FILE_NAME}"
             ) from error
+        except (NotImplementedError, ValueError) as error:
+            # eg. --scope / --host not supported by the state backend
+            raise CommandError(str(error)) from error
+
+    def get_maintenance_mode_raw_value(self, scope=None, host=None):
+        backend = core.get_maintenance_mode_backend()
+        if host is not None:
+            # hosts can't be scheduled
+            return self.get_maintenance_mode(host=host)
+        if scope is None:
+            return backend.get_value()
+        try:
+            return backend.get_values([scope]).get(scope, False)
+        except NotImplementedError as error:
+            raise CommandError(str(error)) from error
 
-    def set_maintenance_mode(self, value, start=None, end=None):
+    def set_maintenance_mode(self, value, start=None, end=None, scope=None, host=None):
         try:
-            core.set_maintenance_mode(value, start=start, end=end)
+            core.set_maintenance_mode(
+                value, start=start, end=end, scope=scope, host=host
+            )
         except OSError as error:
             raise CommandError(
                 "Unable to write state file at: "
                 f"{settings.MAINTENANCE_MODE_STATE_FILE_NAME}"
             ) from error
-        except (ImproperlyConfigured, TypeError, ValueError) as error:
+        except (
+            ImproperlyConfigured,
+            NotImplementedError,
+            TypeError,
+            ValueError,
+        ) as error:
             raise CommandError(str(error)) from error
 
     def set_maintenance_mode_with_confirm(
-        self, value, confirm_message, interactive, start=None, end=None
+        self,
+        value,
+        confirm_message,
+        interactive,
+        start=None,
+        end=None,
+        scope=None,
+        host=None,
     ):
-        if interactive:
-            if self.confirm(confirm_message):
-                self.set_maintenance_mode(value, start=start, end=end)
-        else:
-            self.set_maintenance_mode(value, start=start, end=end)
+        if interactive and not self.confirm(confirm_message):
+            return
+        self.set_maintenance_mode(value, start=start, end=end, scope=scope, host=host)
+
+    def get_maintenance_mode_name(self, scope=None, host=None):
+        if scope is not None and host is not None:
+            raise CommandError("--scope / --host options can't be used together")
+        target = scope or host
+        if target is None:
+            return "maintenance mode"
+        return f"maintenance mode ({target})"
 
     def confirm(self, message):
         input_func = input
@@ -59,21 +96,30 @@ class Command(BaseCommand):
         interactive = options.get("interactive", False)
         start = options.get("start")
         end = options.get("end")
+        scope = options.get("scope")
+        host = options.get("host")
+        name = self.get_maintenance_mode_name(scope, host)
         scheduled = start is not None or end is not None
         state = options["state"]
         state = state.lower()
-        value = self.get_maintenance_mode()
-        backend = core.get_maintenance_mode_backend()
-        scheduled_state = isinstance(backend.get_value(), dict)
+        value = self.get_maintenance_mode(scope, host)
+        raw_value = self.get_maintenance_mode_raw_value(scope, host)
+        scheduled_state = isinstance(raw_value, dict)
 
         if state in ["on", "yes", "true", "1"]:
             if value and not scheduled and not scheduled_state:
                 if verbose:
-                    self.stdout.write("maintenance mode is already on")
+                    self.stdout.write(f"{name} is already on")
                 return
 
             self.set_maintenance_mode_with_confirm(
-                True, "maintenance mode on? (y/N) ", interactive, start=start, end=end
+                True,
+                f"{name} on? (y/N) ",
+                interactive,
+                start=start,
+                end=end,
+                scope=scope,
+                host=host,
             )
 
         elif state in ["off", "no", "false", "0"]:
@@ -84,22 +130,22 @@ class Command(BaseCommand):
 
             if not value and not scheduled_state:
                 if verbose:
-                    self.stdout.write("maintenance mode is already off")
+                    self.stdout.write(f"{name} is already off")
                 return
 
             self.set_maintenance_mode_with_confirm(
-                False, "maintenance mode off? (y/N) ", interactive
+                False, f"{name} off? (y/N) ", interactive, scope=scope, host=host
             )
 
         else:
             raise CommandError(f"Invalid argument: {state!r} expected {self.args}")
 
         if verbose:
-            state_str = "on" if self.get_maintenance_mode() else "off"
-            raw_value = backend.get_value()
+            state_str = "on" if self.get_maintenance_mode(scope, host) else "off"
+            raw_value = self.get_maintenance_mode_raw_value(scope, host)
             if isinstance(raw_value, dict):
                 state_str = f"{state_str} (scheduled: {raw_value})"
-            output = f"maintenance mode: {state_str}"
+            output = f"{name}: {state_str}"
             self.stdout.write(output)
 
         return
@@ -0,0 +1,349 @@
+import ipaddress
+import re
+from bisect import bisect_right
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import (
+    NoReverseMatch,
+    URLResolver,
+    get_resolver,
+    get_script_prefix,
+    get_urlconf,
+    reverse,
+)
+from django.urls.resolvers import RegexPattern, RoutePattern
+from django.utils import translation
+
+# characters which make a pattern a regular expression instead of a literal prefix
+_REGEX_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+_matchers = {}
+
+
+class PrefixMatcher:
+    """
+    Match strings against a set of literal prefixes,
+    with a single set lookup for each distinct prefix length.
+    """
+
+    def __init__(self, prefixes):
+        self.prefixes = frozenset(prefixes)
+        self.lengths = sorted({len(prefix) for prefix in self.prefixes})
+
+    def __bool__(self):
+        return bool(self.prefixes)
+
+    def match(self, value):
+        prefixes = self.prefixes
+        for length in self.lengths:
+            if length > len(value):
+                break
+            if value[:length] in prefixes:
+                return True
+        return False
+
+
+class URLMatcher:
+    """
+    Match url paths against a list of patterns (strings or compiled regexes)
+    with the same semantics of 're.match': literal patterns are matched
+    as prefixes, the other ones are combined in a single regex
+    (the patterns which can't be combined, eg. with groups or flags, are kept apart).
+    """
+
+    def __init__(self, patterns):
+        prefixes = []
+        combinable = []
+        self.regexes = []
+        for pattern in patterns or ():
+            if not isinstance(pattern, re.Pattern):
+                pattern = str(pattern)
+                if not _REGEX_CHARS.intersection(pattern):
+                    prefixes.append(pattern)
+                    continue
+                pattern = re.compile(pattern)
+            if pattern.groups or pattern.flags != re.UNICODE:
+                # backreferences and flags would change meaning once combined
+                self.regexes.append(pattern)
+            else:
+                combinable.append(pattern.pattern)
+        self.prefix_matcher = PrefixMatcher(prefixes)
+        if len(combinable) == 1:
+            self.regexes.insert(0, re.compile(combinable[0]))
+        elif combinable:
+            self.regexes.insert(
+                0, re.compile("|".join(f"(?:{pattern})" for pattern in combinable))
+            )
+
+    def match(self, path):
+        if self.prefix_matcher and self.prefix_matcher.match(path):
+            return True
+        for regex in self.regexes:
+            if regex.match(path):
+                return True
+        return False
+
+
+class IPNetworksMatcher:
+    """
+    Match ip addresses against a list of networks (IPv4 and IPv6),
+    collapsed in sorted non-overlapping intervals searched with bisect.
+    """
+
+    def __init__(self, networks):
+        self.intervals = {}
+        for version in (4, 6):
+            collapsed = ipaddress.collapse_addresses(
+                network for network in networks if network.version == version
+            )
+            intervals = [
+                (int(network.network_address), int(network.broadcast_address))
+                for network in collapsed
+            ]
+            if intervals:
+                self.intervals[version] = (
+                    [start for start, _ in intervals],
+                    [end for _, end in intervals],
+                )
+
+    def __bool__(self):
+        return bool(self.intervals)
+
+    def match(self, ip_address):
+        if ip_address.version == 6 and ip_address.ipv4_mapped:
+            ip_address = ip_address.ipv4_mapped
+        intervals = self.intervals.get(ip_address.version)
+        if intervals is None:
+            return False
+        starts, ends = intervals
+        value = int(ip_address)
+        index = bisect_right(starts, value) - 1
+        return index >= 0 and value <= ends[index]
+
+
+class IPMatcher:
+    """
+    Match ip addresses against a list of entries: networks and addresses
+    (ipaddress objects or strings in CIDR notation) are matched by
+    an IPNetworksMatcher, the other strings keep the regex semantics ('re.match').
+    """
+
+    def __init__(self, entries):
+        networks = []
+        patterns = []
+        for entry in entries or ():
+            if isinstance(entry, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+                networks.append(ipaddress.ip_network(entry))
+            elif isinstance(entry, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+                networks.append(entry)
+            elif isinstance(entry, str) and "/" in entry:
+                try:
+                    networks.append(ipaddress.ip_network(entry, strict=False))
+                except ValueError:
+                    patterns.append(entry)
+            else:
+                patterns.append(entry)
+        self.networks_matcher = IPNetworksMatcher(networks)
+        self.patterns_matcher = URLMatcher(patterns)
+
+    def match(self, ip_address):
+        if self.networks_matcher:
+            try:
+                address = ipaddress.ip_address(ip_address)
+            except ValueError:
+                pass
+            else:
+                if self.networks_matcher.match(address):
+                    return True
+        return self.patterns_matcher.match(ip_address)
+
+
+def _has_alternation(regex):
+    index = 0
+    while index < len(regex):
+        char = regex[index]
+        if char == "\\":
+            # escaped char
+            index += 2
+            continue
+        if char == "|":
+            return True
+        index += 1
+    return False
+
+
+def _get_regex_prefix(regex):
+    # unanchored patterns can match anywhere in the path,
+    # and alternatives (eg. "^foo/|^bar/") can have different prefixes
+    if not regex.startswith("^") or _has_alternation(regex):
+        return "", False
+    regex = regex[1:]
+    chars = []
+    index = 0
+    while index < len(regex):
+        char = regex[index]
+        step = 1
+        escaped_char = regex[index + 1 : index + 2]
+        if char == "\\" and escaped_char and not escaped_char.isalnum():
+            # escaped literal char, eg. "\-"
+            char = escaped_char
+            step = 2
+        elif char in _REGEX_CHARS:
+            break
+        # a char followed by these quantifiers is optional
+        if regex[index + step : index + step + 1] in ("?", "*", "{"):
+            break
+        chars.append(char)
+        index += step
+    rest = regex[index:]
+    return "".join(chars), rest in ("", "$", "\\Z")
+
+
+def _get_pattern_prefix(pattern):
+    """
+    Get the literal prefix of an url pattern and whether the pattern
+    is made only by the prefix.
+    """
+    if isinstance(pattern, RoutePattern):
+        prefix, converter, _ = str(pattern._route).partition("<")
+        return prefix, not converter
+    if isinstance(pattern, RegexPattern):
+        return _get_regex_prefix(str(pattern._regex))
+    # eg. LocalePrefixPattern, the prefix depends on the active language
+    return "", False
+
+
+def _is_forced_view(view_func):
+    view_dict = getattr(view_func, "__dict__", {})
+    return bool(
+        view_dict.get("force_maintenance_mode_off", False)
+        or view_dict.get("force_maintenance_mode_on", False)
+    )
+
+
+def _get_forced_views_prefixes(resolver, prefix, literal):
+    for url_pattern in resolver.url_patterns:
+        if literal:
+            pattern_prefix, pattern_literal = _get_pattern_prefix(url_pattern.pattern)
+            url_prefix = prefix + pattern_prefix
+        else:
+            url_prefix, pattern_literal = prefix, False
+        if isinstance(url_pattern, URLResolver):
+            yield from _get_forced_views_prefixes(
+                url_pattern, url_prefix, pattern_literal
+            )
+        elif _is_forced_view(url_pattern.callback):
+            yield url_prefix
+
+
+class ForcedViewsMatcher:
+    """
+    Resolve the forced views (decorated with 'force_maintenance_mode_off/on')
+    of an urlconf: the urlconf is walked once to index the literal prefixes
+    of the forced views routes, and only the paths starting with one of them
+    are resolved (the results are reused for the next requests).
+    """
+
+    max_results = 1024
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        prefix, literal = _get_pattern_prefix(resolver.pattern)
+        self.prefix_matcher = PrefixMatcher(
+            _get_forced_views_prefixes(resolver, prefix, literal)
+        )
+        self.results = {}
+
+    def resolve(self, path):
+        """
+        Get the resolved view function of the given path, or None
+        if the path can't be resolved to a forced view.
+        Raises Resolver404 as 'django.urls.resolve'.
+        """
+        if not self.prefix_matcher.match(path):
+            return None
+        results = self.results
+        if path in results:
+            return results[path]
+        view_func = self.resolver.resolve(path)[0]
+        view_func = view_func if _is_forced_view(view_func) else None
+        if len(results) >= self.max_results:
+            results.clear()
+        results[path] = view_func
+        return view_func
+
+
+def get_forced_views_matcher(urlconf=None):
+    """
+    Get the forced views matcher of the given (or current) urlconf,
+    rebuilt when the urlconf resolver changes (eg. 'clear_url_caches').
+    """
+    if urlconf is None:
+        urlconf = get_urlconf()
+    resolver = get_resolver(urlconf)
+    key = ("forced_views", urlconf)
+    matcher = _matchers.get(key)
+    if matcher is None or matcher.resolver is not resolver:
+        matcher = ForcedViewsMatcher(resolver)
+        _matchers[key] = matcher
+    return matcher
+
+
+def get_reversed_url(viewname):
+    """
+    Get the url of the given view name (or None if it is not installed)
+    for the current urlconf, script prefix and language (eg. 'i18n_patterns'),
+    computed only once, and again when the urlconf resolver changes
+    (eg. 'clear_url_caches').
+    """
+    urlconf = get_urlconf()
+    resolver = get_resolver(urlconf)
+    key = (
+        "reversed_url",
+        viewname,
+        urlconf,
+        get_script_prefix(),
+        translation.get_language(),
+    )
+    entry = _matchers.get(key)
+    if entry is None or entry[0] is not resolver:
+        try:
+            url = reverse(viewname, urlconf=urlconf)
+        except NoReverseMatch:
+            url = None
+        entry = (resolver, url)
+        _matchers[key] = entry
+    return entry[1]
+
+
+def _get_matcher(setting_name, matcher_class):
+    # rebuilt when the setting is replaced (or changed in place)
+    value = getattr(settings, setting_name)
+    size = len(value) if value else 0
+    entry = _matchers.get(setting_name)
+    if entry is None or entry[0] is not value or entry[1] != size:
+        entry = (value, size, matcher_class(value))
+        _matchers[setting_name] = entry
+    return entry[2]
+
+
+def get_ignore_urls_matcher():
+    """
+    Get the matcher compiled from 'settings.MAINTENANCE_MODE_IGNORE_URLS'.
+    """
+    return _get_matcher("MAINTENANCE_MODE_IGNORE_URLS", URLMatcher)
+
+
+def get_ignore_ip_addresses_matcher():
+    """
+    Get the matcher compiled from 'settings.MAINTENANCE_MODE_IGNORE_IP_ADDRESSES'.
+    """
+    return _get_matcher("MAINTENANCE_MODE_IGNORE_IP_ADDRESSES", IPMatcher)
+
+
+@receiver(setting_changed)
+def _clear_matchers(setting, **kwargs):
+    if setting.startswith("MAINTENANCE_MODE_") or setting == "ROOT_URLCONF":
+        _matchers.clear()
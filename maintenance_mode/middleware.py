@@ -1,17 +1,42 @@
-from maintenance_mode.http import get_maintenance_response, need_maintenance_response
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from maintenance_mode.http import (
+    aget_maintenance_response,
+    aneed_maintenance_response,
+    get_maintenance_response,
+    need_maintenance_response,
+)
 
 
 class MaintenanceModeMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response=None):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         response = self.process_request(request)
         if response is None and callable(self.get_response):
             response = self.get_response(request)
         return response
 
+    async def __acall__(self, request):
+        response = await self.aprocess_request(request)
+        if response is None and callable(self.get_response):
+            response = await self.get_response(request)
+        return response
+
     def process_request(self, request):
         if need_maintenance_response(request):
             return get_maintenance_response(request)
         return None
+
+    async def aprocess_request(self, request):
+        if await aneed_maintenance_response(request):
+            return await aget_maintenance_response(request)
+        return None
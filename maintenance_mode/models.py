@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class State(models.Model):
+    """
+    Maintenance mode state used by 'maintenance_mode.backends.DatabaseBackend',
+    the value is serialized (boolean or schedule) and the version
+    is incremented on each write.
+    """
+
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.TextField(default="0")
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "state"
+        verbose_name_plural = "states"
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
@@ -0,0 +1,235 @@
+import re
+import sys
+
+from django.conf import settings
+from django.contrib.auth import logout
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from maintenance_mode.matchers import IPMatcher, URLMatcher, get_reversed_url
+from maintenance_mode.utils import get_client_ip_address, import_function
+
+# the settings the policy is compiled from
+POLICY_SETTINGS = (
+    "MAINTENANCE_MODE_GET_AUTHENTICATED_USER",
+    "MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS",
+    "MAINTENANCE_MODE_IGNORE_ADMIN_SITE",
+    "MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER",
+    "MAINTENANCE_MODE_IGNORE_AUTHENTICATED_USER",
+    "MAINTENANCE_MODE_IGNORE_IP_ADDRESSES",
+    "MAINTENANCE_MODE_IGNORE_STAFF",
+    "MAINTENANCE_MODE_IGNORE_SUPERUSER",
+    "MAINTENANCE_MODE_IGNORE_TESTS",
+    "MAINTENANCE_MODE_IGNORE_URLS",
+    "MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER",
+    "MAINTENANCE_MODE_LOGOUT_STAFF_USER",
+    "MAINTENANCE_MODE_LOGOUT_SUPERUSER",
+    "MAINTENANCE_MODE_REDIRECT_URL",
+)
+
+_policy = None
+
+
+def _is_testing():
+    # python runtests.py | python manage.py test | python
+    # setup.py test | django-admin.py test
+    return (len(sys.argv) > 0 and "runtests" in sys.argv[0]) or (
+        len(sys.argv) > 1 and sys.argv[1] == "test"
+    )
+
+
+class MaintenancePolicy:
+    """
+    Maintenance policy compiled from settings: the ordered checks
+    which tell if a request needs a maintenance response when maintenance mode
+    is on, only the enabled ones are compiled (with the configured functions
+    already imported), so the disabled ones cost nothing.
+    """
+
+    def __init__(self):
+        options = {name: getattr(settings, name) for name in POLICY_SETTINGS}
+        checks = [self._need_maintenance_from_url]
+
+        self.logout_authenticated_user = options[
+            "MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER"
+        ]
+        self.logout_staff_user = options["MAINTENANCE_MODE_LOGOUT_STAFF_USER"]
+        self.logout_superuser = options["MAINTENANCE_MODE_LOGOUT_SUPERUSER"]
+        self.ignore_anonymous_user = options["MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER"]
+        self.ignore_authenticated_user = options[
+            "MAINTENANCE_MODE_IGNORE_AUTHENTICATED_USER"
+        ]
+        self.ignore_staff = options["MAINTENANCE_MODE_IGNORE_STAFF"]
+        self.ignore_superuser = options["MAINTENANCE_MODE_IGNORE_SUPERUSER"]
+        self.logout_users = any(
+            (
+                self.logout_authenticated_user,
+                self.logout_staff_user,
+                self.logout_superuser,
+            )
+        )
+        ignore_users = any(
+            (
+                self.ignore_anonymous_user,
+                self.ignore_authenticated_user,
+                self.ignore_staff,
+                self.ignore_superuser,
+            )
+        )
+        if self.logout_users or ignore_users:
+            self.get_authenticated_user_func = None
+            if options["MAINTENANCE_MODE_GET_AUTHENTICATED_USER"]:
+                self.get_authenticated_user_func = import_function(
+                    options["MAINTENANCE_MODE_GET_AUTHENTICATED_USER"],
+                    "MAINTENANCE_MODE_GET_AUTHENTICATED_USER",
+                )
+            checks.append(self._need_maintenance_ignore_users)
+
+        if options["MAINTENANCE_MODE_IGNORE_ADMIN_SITE"]:
+            checks.append(self._need_maintenance_ignore_admin_site)
+
+        if options["MAINTENANCE_MODE_IGNORE_TESTS"] and _is_testing():
+            checks.append(self._need_maintenance_ignore_tests)
+
+        if options["MAINTENANCE_MODE_IGNORE_IP_ADDRESSES"]:
+            self.get_client_ip_address_func = get_client_ip_address
+            if options["MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS"]:
+                self.get_client_ip_address_func = import_function(
+                    options["MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS"],
+                    "MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS",
+                )
+            self.ignore_ip_addresses_matcher = IPMatcher(
+                options["MAINTENANCE_MODE_IGNORE_IP_ADDRESSES"]
+            )
+            checks.append(self._need_maintenance_ignore_ip_addresses)
+
+        if options["MAINTENANCE_MODE_IGNORE_URLS"]:
+            self.ignore_urls_matcher = URLMatcher(
+                options["MAINTENANCE_MODE_IGNORE_URLS"]
+            )
+            checks.append(self._need_maintenance_ignore_urls)
+
+        if options["MAINTENANCE_MODE_REDIRECT_URL"]:
+            self.redirect_url_re = re.compile(options["MAINTENANCE_MODE_REDIRECT_URL"])
+            checks.append(self._need_maintenance_redirects)
+
+        self.checks = tuple(checks)
+
+    def need_maintenance(self, request):
+        """
+        Tells if the given request needs a maintenance response or not,
+        when maintenance mode is on.
+        """
+        for check in self.checks:
+            value = check(request)
+            if isinstance(value, bool):
+                return value
+        return True
+
+    def _need_maintenance_from_url(self, request):
+        url_off = get_reversed_url("maintenance_mode_off")
+        if url_off is None:
+            # maintenance_mode.urls not added
+            return
+        if url_off == request.path_info:
+            return False
+
+    def _need_maintenance_logout_user(self, user):
+        if not self.logout_users or not user.is_authenticated:
+            return False
+        if user.is_superuser:
+            if self.logout_superuser is not None:
+                return self.logout_superuser
+            return self.logout_authenticated_user
+        if user.is_staff:
+            if self.logout_staff_user is not None:
+                return self.logout_staff_user
+            return self.logout_authenticated_user
+        return self.logout_authenticated_user
+
+    def _get_maintenance_authenticated_user(self, request):
+        if self.get_authenticated_user_func is not None:
+            user = self.get_authenticated_user_func(request=request)
+            if user is not None:
+                return user
+        return getattr(request, "user", None)
+
+    def _need_maintenance_ignore_users(self, request):
+        user = self._get_maintenance_authenticated_user(request)
+        if user is None:
+            return
+
+        if self._need_maintenance_logout_user(user):
+            logout(request)
+            user = request.user
+
+        if self.ignore_anonymous_user and user.is_anonymous:
+            return False
+
+        if self.ignore_authenticated_user and user.is_authenticated:
+            return False
+
+        if self.ignore_staff and user.is_staff:
+            return False
+
+        if self.ignore_superuser and user.is_superuser:
+            return False
+
+    def _need_maintenance_ignore_admin_site(self, request):
+        admin_url = get_reversed_url("admin:index")
+        if admin_url is None:
+            # admin.urls not added
+            return
+
+        request_path = request.path if request.path else ""
+        if not request_path.endswith("/"):
+            request_path += "/"
+
+        if request_path.startswith(admin_url):
+            return False
+
+    def _need_maintenance_ignore_tests(self, request):
+        return False
+
+    def _need_maintenance_ignore_ip_addresses(self, request):
+        client_ip_address = self.get_client_ip_address_func(request)
+        if self.ignore_ip_addresses_matcher.match(client_ip_address):
+            return False
+
+    def _need_maintenance_ignore_urls(self, request):
+        if self.ignore_urls_matcher.match(request.path_info):
+            return False
+
+    def _need_maintenance_redirects(self, request):
+        if self.redirect_url_re.match(request.path_info):
+            return False
+
+
+def get_maintenance_policy():
+    """
+    Get the maintenance policy compiled from the settings, it is compiled
+    only once and again when any of its settings changes (eg. 'override_settings'),
+    settings changed directly at runtime require 'clear_maintenance_policy()'.
+    """
+    global _policy
+    policy = _policy
+    if policy is None:
+        policy = MaintenancePolicy()
+        # replaced atomically, requests use either the old or the new policy
+        _policy = policy
+    return policy
+
+
+def clear_maintenance_policy():
+    """
+    Discard the compiled maintenance policy,
+    it will be compiled again on the next request.
+    """
+    global _policy
+    _policy = None
+
+
+@receiver(setting_changed)
+def _clear_maintenance_policy(setting, **kwargs):
+    if setting in POLICY_SETTINGS:
+        clear_maintenance_policy()
@@ -49,6 +49,9 @@ if not hasattr(settings, "MAINTENANCE_MODE_LOGOUT_STAFF_USER"):
 if not hasattr(settings, "MAINTENANCE_MODE_LOGOUT_SUPERUSER"):
     settings.MAINTENANCE_MODE_LOGOUT_SUPERUSER = None
 
+if not hasattr(settings, "MAINTENANCE_MODE_PER_HOST"):
+    settings.MAINTENANCE_MODE_PER_HOST = False
+
 if not hasattr(settings, "MAINTENANCE_MODE_REDIRECT_URL"):
     settings.MAINTENANCE_MODE_REDIRECT_URL = None
 
@@ -58,6 +61,9 @@ if not hasattr(settings, "MAINTENANCE_MODE_RESPONSE_TYPE"):
 if not hasattr(settings, "MAINTENANCE_MODE_RETRY_AFTER"):
     settings.MAINTENANCE_MODE_RETRY_AFTER = 3600
 
+if not hasattr(settings, "MAINTENANCE_MODE_SCOPES"):
+    settings.MAINTENANCE_MODE_SCOPES = {}
+
 if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND"):
     settings.MAINTENANCE_MODE_STATE_BACKEND = (
         "maintenance_mode.backends.LocalFileBackend"
@@ -66,9 +72,51 @@ if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND"):
 if not hasattr(settings, "MAINTENANCE_MODE_CACHE_BACKEND"):
     settings.MAINTENANCE_MODE_CACHE_BACKEND = None
 
+if not hasattr(settings, "MAINTENANCE_MODE_CACHE_BACKEND_CHECK_INTERVAL"):
+    settings.MAINTENANCE_MODE_CACHE_BACKEND_CHECK_INTERVAL = 1
+
+if not hasattr(settings, "MAINTENANCE_MODE_DATABASE_BACKEND_CHECK_INTERVAL"):
+    settings.MAINTENANCE_MODE_DATABASE_BACKEND_CHECK_INTERVAL = 1
+
 if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE"):
     settings.MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE = False
 
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_CHAIN"):
+    settings.MAINTENANCE_MODE_STATE_BACKEND_CHAIN = []
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_REPLICAS"):
+    settings.MAINTENANCE_MODE_STATE_BACKEND_REPLICAS = []
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_READ_QUORUM"):
+    settings.MAINTENANCE_MODE_STATE_BACKEND_READ_QUORUM = None
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_WRITE_QUORUM"):
+    settings.MAINTENANCE_MODE_STATE_BACKEND_WRITE_QUORUM = None
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_REPLICA_TIMEOUT"):
+    settings.MAINTENANCE_MODE_STATE_BACKEND_REPLICA_TIMEOUT = 5
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_TIMEOUT"):
+    settings.MAINTENANCE_MODE_STATE_BACKEND_TIMEOUT = None
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_FAILURE_THRESHOLD"):
+    settings.MAINTENANCE_MODE_STATE_BACKEND_FAILURE_THRESHOLD = 5
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_RETRY_INTERVAL"):
+    settings.MAINTENANCE_MODE_STATE_BACKEND_RETRY_INTERVAL = 1
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_BACKEND_MAX_RETRY_INTERVAL"):
+    settings.MAINTENANCE_MODE_STATE_BACKEND_MAX_RETRY_INTERVAL = 60
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_CACHE_TIMEOUT"):
+    settings.MAINTENANCE_MODE_STATE_CACHE_TIMEOUT = 0
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_REFRESH_INTERVAL"):
+    settings.MAINTENANCE_MODE_STATE_REFRESH_INTERVAL = None
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_MAX_STALENESS"):
+    settings.MAINTENANCE_MODE_STATE_MAX_STALENESS = 60
+
 if not hasattr(settings, "MAINTENANCE_MODE_STATE_FILE_NAME"):
     settings.MAINTENANCE_MODE_STATE_FILE_NAME = "maintenance_mode_state.txt"
 
@@ -78,6 +126,15 @@ if not hasattr(settings, "MAINTENANCE_MODE_STATE_FILE_PATH"):
         settings_module.__file__, settings.MAINTENANCE_MODE_STATE_FILE_NAME
     )
 
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_FILE_WATCH"):
+    settings.MAINTENANCE_MODE_STATE_FILE_WATCH = False
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_FILE_WATCH_INTERVAL"):
+    settings.MAINTENANCE_MODE_STATE_FILE_WATCH_INTERVAL = 1
+
+if not hasattr(settings, "MAINTENANCE_MODE_STATE_SHARED_MEMORY_PATH"):
+    settings.MAINTENANCE_MODE_STATE_SHARED_MEMORY_PATH = None
+
 if not hasattr(settings, "MAINTENANCE_MODE_STATUS_CODE"):
     settings.MAINTENANCE_MODE_STATUS_CODE = 503
 
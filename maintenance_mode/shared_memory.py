@@ -0,0 +1,113 @@
+import mmap
+import os
+import struct
+import threading
+import time
+
+from maintenance_mode.io import set_file_permissions
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+# segment layout: sequence counter (uint64), payload length (uint32), payload
+SEGMENT_HEADER = struct.Struct("=QI")
+SEGMENT_SEQUENCE = struct.Struct("=Q")
+SEGMENT_SIZE = mmap.PAGESIZE
+
+
+class SharedMemorySegment:
+    """
+    Small memory-mapped file shared by all the processes of the host.
+    The payload is protected by a sequence counter (seqlock): the writer
+    makes the counter odd while writing and even again when done,
+    readers read the payload lock-free and retry if the counter changed.
+    Concurrent writers (of different processes) are serialized using flock().
+    """
+
+    def __init__(self, filepath, size=SEGMENT_SIZE):
+        self.filepath = filepath
+        self.size = size
+        self._fd = None
+        self._mmap = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        mm = self._mmap
+        if mm is not None:
+            return mm
+        with self._lock:
+            if self._mmap is None:
+                dirpath = os.path.dirname(os.path.abspath(self.filepath))
+                os.makedirs(dirpath, exist_ok=True)
+                fd = os.open(self.filepath, os.O_RDWR | os.O_CREAT, 0o666)
+                try:
+                    if os.fstat(fd).st_size < self.size:
+                        os.ftruncate(fd, self.size)
+                        set_file_permissions(self.filepath)
+                    self._mmap = mmap.mmap(fd, self.size)
+                except Exception:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+            return self._mmap
+
+    @property
+    def sequence(self):
+        """
+        The current sequence counter (a single memory load).
+        """
+        return SEGMENT_SEQUENCE.unpack_from(self._open(), 0)[0]
+
+    def read(self, retries=1000):
+        """
+        Return a (sequence, payload) tuple read consistently from the segment.
+        """
+        mm = self._open()
+        for _ in range(retries):
+            sequence, length = SEGMENT_HEADER.unpack_from(mm, 0)
+            if not sequence & 1:
+                start = SEGMENT_HEADER.size
+                payload = mm[start : start + length]
+                if SEGMENT_SEQUENCE.unpack_from(mm, 0)[0] == sequence:
+                    return sequence, payload
+            # a write is in progress, let the writer complete it
+            time.sleep(0)
+        raise OSError(f"Unable to read a consistent state from {self.filepath!r}")
+
+    def write(self, payload):
+        """
+        Write the payload to the segment and return the new sequence counter.
+        """
+        start = SEGMENT_HEADER.size
+        if len(payload) > self.size - start:
+            raise ValueError(
+                f"payload size exceeds the shared memory segment capacity: "
+                f"{len(payload)} > {self.size - start}"
+            )
+        mm = self._open()
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                sequence = SEGMENT_SEQUENCE.unpack_from(mm, 0)[0]
+                # an odd sequence means that a writer died while writing
+                sequence += 1 if sequence & 1 else 2
+                SEGMENT_SEQUENCE.pack_into(mm, 0, sequence - 1)
+                mm[start : start + len(payload)] = payload
+                SEGMENT_HEADER.pack_into(mm, 0, sequence - 1, len(payload))
+                SEGMENT_SEQUENCE.pack_into(mm, 0, sequence)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return sequence
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
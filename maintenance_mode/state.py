@@ -0,0 +1,297 @@
+import logging
+import os
+import threading
+import time
+import weakref
+
+from maintenance_mode.utils import RateLimitedLog, get_now_datetime
+
+logger = logging.getLogger(__name__)
+
+_refreshers = weakref.WeakSet()
+
+
+class StateCache:
+    """
+    Thread-safe process-local cache of the state value read from the backend.
+    Entries expire after the given timeout (in seconds) and can be
+    invalidated explicitly by calling clear().
+    """
+
+    def __init__(self):
+        self._entry = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def lookup(self, key):
+        """
+        Return a (found, value) tuple for the cached value of key.
+        """
+        entry = self._entry
+        if entry is not None and entry[0] == key and time.monotonic() < entry[2]:
+            return True, entry[1]
+        return False, None
+
+    def store(self, key, value, timeout, generation):
+        """
+        Cache the value for key, unless it has been invalidated
+        after the given generation (when the value loading started).
+        """
+        with self._lock:
+            if generation == self._generation:
+                self._entry = (key, value, time.monotonic() + timeout)
+
+    def get(self, key, timeout, loader):
+        """
+        Return the cached value for key if it is not expired,
+        otherwise call loader() to get a fresh value and cache it.
+        """
+        found, value = self.lookup(key)
+        if found:
+            return value
+        # only one thread at a time refreshes the value,
+        # the other ones wait for it instead of hitting the backend too
+        with self._refresh_lock:
+            found, value = self.lookup(key)
+            if found:
+                return value
+            generation = self._generation
+            value = loader()
+            self.store(key, value, timeout, generation)
+        return value
+
+    def clear(self):
+        """
+        Invalidate the cached value.
+        """
+        with self._lock:
+            self._entry = None
+            self._generation += 1
+
+
+class StateRefresher:
+    """
+    Refresh the state value in a background (daemon) thread every 'interval'
+    seconds, so that reading it never waits for the backend
+    (stale-while-revalidate). If the last refresh is older than 'max_staleness'
+    seconds (eg. because the backend is failing) the value is refreshed
+    synchronously. The thread is started lazily, also in forked child processes.
+    """
+
+    def __init__(self):
+        self.key = None
+        self.loader = None
+        self.interval = None
+        self._entry = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._log = RateLimitedLog(logger)
+        _refreshers.add(self)
+
+    @property
+    def running(self):
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def watch(self, key, loader, interval):
+        """
+        Refresh the value for key calling loader() every 'interval' seconds.
+        """
+        self.key = key
+        self.loader = loader
+        self.interval = interval
+        if not self.running:
+            self.start()
+
+    def lookup(self, key, max_staleness=None):
+        """
+        Return a (found, value) tuple for the last refreshed value of key.
+        """
+        entry = self._entry
+        if (
+            entry is not None
+            and entry[0] == key
+            and (not max_staleness or time.monotonic() - entry[2] <= max_staleness)
+        ):
+            return True, entry[1]
+        return False, None
+
+    def store(self, key, value, generation):
+        """
+        Keep the value for key, unless it has been invalidated
+        after the given generation (when the value loading started).
+        """
+        with self._lock:
+            if generation == self._generation:
+                self._entry = (key, value, time.monotonic())
+
+    def get(self, key, loader, interval, max_staleness=None):
+        """
+        Return the last refreshed value for key,
+        or refresh it synchronously if missing or too stale.
+        """
+        self.watch(key, loader, interval)
+        found, value = self.lookup(key, max_staleness)
+        if found:
+            return value
+        return self.refresh(key, loader)
+
+    def refresh(self, key, loader):
+        requested_at = time.monotonic()
+        with self._refresh_lock:
+            # another thread could have refreshed the value in the meanwhile
+            entry = self._entry
+            if entry is not None and entry[0] == key and entry[2] >= requested_at:
+                return entry[1]
+            generation = self._generation
+            value = loader()
+            # values loaded before an invalidation are not kept
+            self.store(key, value, generation)
+        return value
+
+    def clear(self):
+        """
+        Invalidate the refreshed value.
+        """
+        with self._lock:
+            self._entry = None
+            self._generation += 1
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(self._stop_event,),
+                name="maintenance-mode-state-refresher",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def _reset_after_fork(self):
+        # threads don't survive fork(), the value could be stale too
+        self._thread = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._log = RateLimitedLog(logger)
+        self._entry = None
+
+    def _run(self, stop_event):
+        while not stop_event.wait(self.interval):
+            key = self.key
+            loader = self.loader
+            if loader is None:
+                continue
+            try:
+                self.refresh(key, loader)
+            except Exception as error:
+                self._log.warning(
+                    "The following unexpected exception has been raised "
+                    "while refreshing the maintenance mode state."
+                    f"\nException: {error}"
+                )
+
+
+def _reset_refreshers_after_fork():
+    for refresher in list(_refreshers):
+        refresher._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_refreshers_after_fork)
+
+
+class MaintenanceModeState:
+    """
+    Snapshot of the maintenance mode state:
+    the evaluated value, the raw schedule state (if any),
+    the scope of the state (None for the global state)
+    and the timestamp of the evaluation.
+    """
+
+    __slots__ = ("value", "schedule", "scope", "timestamp")
+
+    def __init__(self, value, schedule=None, timestamp=None, scope=None):
+        self.value = value
+        self.schedule = schedule
+        self.scope = scope
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(value={self.value!r}, "
+            f"schedule={self.schedule!r}, scope={self.scope!r}, "
+            f"timestamp={self.timestamp!r})"
+        )
+
+
+class MaintenanceModeSchedule:
+    """
+    Compiled schedule state, start and end are epoch timestamps (or None).
+    The evaluation result is kept until the next transition (start or end),
+    so evaluating it costs a single time comparison in the meanwhile
+    (it is evaluated again if the clock goes backwards).
+    """
+
+    __slots__ = ("start", "end", "_evaluation")
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+        # (evaluated_at, valid_until, active)
+        self._evaluation = (float("inf"), float("-inf"), False)
+
+    @classmethod
+    def from_datetimes(cls, start=None, end=None):
+        return cls(
+            start.timestamp() if start is not None else None,
+            end.timestamp() if end is not None else None,
+        )
+
+    def get_next_transition(self, now=None):
+        """
+        Return the epoch timestamp of the next transition (or None).
+        """
+        if now is None:
+            now = get_now_datetime().timestamp()
+        if self.start is not None and now < self.start:
+            return self.start
+        if self.end is not None and now < self.end:
+            return self.end
+        return None
+
+    def is_active(self, now=None):
+        if now is None:
+            now = get_now_datetime().timestamp()
+        evaluated_at, valid_until, active = self._evaluation
+        if evaluated_at <= now < valid_until:
+            return active
+        started = self.start is None or self.start <= now
+        ended = self.end is not None and self.end <= now
+        active = started and not ended
+        next_transition = self.get_next_transition(now)
+        if next_transition is None:
+            next_transition = float("inf")
+        self._evaluation = (now, next_transition, active)
+        return active
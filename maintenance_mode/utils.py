@@ -1,10 +1,18 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.utils.module_loading import import_string
 
+_executor = None
+_executor_lock = threading.Lock()
+
 
 def get_client_ip_address(request):
     """
@@ -13,6 +21,71 @@ def get_client_ip_address(request):
     return request.META["REMOTE_ADDR"]
 
 
+def get_executor():
+    """
+    Get the (lazily created) thread pool used to run the state backends calls
+    with a timeout, it is created again in forked child processes.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="maintenance-mode"
+                )
+    return _executor
+
+
+def _reset_executor_after_fork():
+    # the pool threads don't survive fork()
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executor_after_fork)
+
+
+def call_closing_connections(func, *args, **kwargs):
+    """
+    Call func in a worker thread and then close its database connections
+    if unusable or obsolete (as done at the end of each request),
+    so the worker threads don't keep them open forever.
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+class RateLimitedLog:
+    """
+    Log warnings at most once every 'interval' seconds,
+    each logged warning tells how many ones have been suppressed before it.
+    """
+
+    def __init__(self, logger, interval=60):
+        self.logger = logger
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._logged_at = float("-inf")
+        self._suppressed = 0
+
+    def warning(self, message):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._logged_at < self.interval:
+                self._suppressed += 1
+                return
+            suppressed = self._suppressed
+            self._logged_at = now
+            self._suppressed = 0
+        if suppressed:
+            message += f"\n({suppressed} similar exceptions have been suppressed)"
+        self.logger.warning(message)
+
+
 def get_now_datetime():
     """
     Get the current datetime as an aware datetime object.
@@ -0,0 +1,231 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import weakref
+
+from maintenance_mode.io import get_file_key
+
+logger = logging.getLogger(__name__)
+
+# inotify constants, see: https://man7.org/linux/man-pages/man7/inotify.7.html
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+
+IN_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+IN_DIR_GONE_MASK = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+_watchers = weakref.WeakSet()
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        _libc.inotify_init1.argtypes = [ctypes.c_int]
+        _libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+    return _libc
+
+
+def _inotify_watch(dirpath):
+    """
+    Create an inotify instance watching the given directory
+    and return its (non-blocking) file descriptor.
+    Raises OSError if inotify is not available.
+    """
+    if not sys.platform.startswith("linux"):
+        raise OSError("inotify is available only on Linux")
+    try:
+        libc = _get_libc()
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (AttributeError, OSError) as error:
+        raise OSError("inotify is not available") from error
+    fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    if inotify_add_watch(fd, os.fsencode(dirpath), IN_WATCH_MASK) < 0:
+        errno = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(errno, os.strerror(errno), dirpath)
+    return fd
+
+
+def _inotify_read_events(fd):
+    """
+    Read the pending inotify events and return a list of (mask, name) tuples.
+    """
+    events = []
+    try:
+        data = os.read(fd, 64 * 1024)
+    except BlockingIOError:
+        return events
+    offset = 0
+    while offset + INOTIFY_EVENT_HEADER.size <= len(data):
+        _, mask, _, length = INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+        offset += INOTIFY_EVENT_HEADER.size
+        name = data[offset : offset + length].rstrip(b"\0")
+        offset += length
+        events.append((mask, os.fsdecode(name)))
+    return events
+
+
+class FileWatcher:
+    """
+    Watch a file and call the given callback (without arguments) when it changes.
+    It uses inotify (Linux only) on the file directory, so that atomic
+    replacements are detected within milliseconds, and falls back to
+    polling the file with os.stat() every 'interval' seconds.
+    The watcher thread is not inherited by forked child processes,
+    use 'running' to check if it needs to be started again.
+    """
+
+    def __init__(self, filepath, callback, interval=1.0):
+        self.filepath = filepath
+        self.callback = callback
+        self.interval = interval
+        self.inotify = False
+        self._fd = None
+        self._file_key = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        _watchers.add(self)
+
+    @property
+    def running(self):
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._file_key = get_file_key(self.filepath)
+        dirpath = os.path.dirname(os.path.abspath(self.filepath))
+        try:
+            self._fd = _inotify_watch(dirpath)
+            self.inotify = True
+        except OSError as error:
+            logger.debug(
+                f"Unable to watch {dirpath!r} using inotify, "
+                f"falling back to polling.\nException: {error}"
+            )
+            self._fd = None
+            self.inotify = False
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"maintenance-mode-watcher-{self.filepath}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+        self._close()
+
+    def _close(self):
+        fd = self._fd
+        self._fd = None
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _reset_after_fork(self):
+        # threads don't survive fork(), release the inherited resources
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._close()
+
+    def _check(self, force=False):
+        # the file key check also covers the events lost by inotify
+        file_key = get_file_key(self.filepath)
+        if force or file_key != self._file_key:
+            self._file_key = file_key
+            self._notify()
+
+    def _notify(self):
+        try:
+            self.callback()
+        except Exception as error:
+            logger.warning(
+                "The following unexpected exception has been raised "
+                f"by the state file watcher callback.\nException: {error}"
+            )
+
+    def _wait_inotify(self):
+        fd = self._fd
+        readable, _, _ = select.select([fd], [], [], self.interval)
+        if not readable:
+            return False
+        changed = False
+        filename = os.path.basename(self.filepath)
+        for mask, name in _inotify_read_events(fd):
+            if mask & IN_DIR_GONE_MASK:
+                # the watched directory is gone, keep on polling
+                self._close()
+            elif name == filename:
+                changed = True
+        return changed
+
+    def _run(self):
+        stop_event = self._stop_event
+        while not stop_event.is_set():
+            try:
+                changed = False
+                if self._fd is not None:
+                    changed = self._wait_inotify()
+                else:
+                    stop_event.wait(self.interval)
+                if not stop_event.is_set():
+                    self._check(force=changed)
+            except Exception as error:
+                logger.warning(
+                    "The following unexpected exception has been raised "
+                    f"while watching the state file.\nException: {error}"
+                )
+                stop_event.wait(self.interval)
+
+
+def _reset_watchers_after_fork():
+    for watcher in list(_watchers):
+        watcher._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_watchers_after_fork)
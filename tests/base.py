@@ -7,6 +7,7 @@ from django.contrib.auth.models import AnonymousUser, User
 from django.test import Client, RequestFactory, TestCase, override_settings
 
 from maintenance_mode import core, middleware
+from maintenance_mode.policy import clear_maintenance_policy
 
 
 @override_settings(
@@ -105,8 +106,18 @@ class MaintenanceModeTestCase(TestCase):
 
     def _reset_state(self):
         settings.MAINTENANCE_MODE = None
+        # the tests change the policy settings directly (without 'setting_changed')
+        clear_maintenance_policy()
         core.set_maintenance_mode(False)
         try:
             os.remove(settings.MAINTENANCE_MODE_STATE_FILE_PATH)
         except OSError:
             pass
+        try:
+            os.remove(f"{settings.MAINTENANCE_MODE_STATE_FILE_PATH}.scopes")
+        except OSError:
+            pass
+        try:
+            os.remove(f"{settings.MAINTENANCE_MODE_STATE_FILE_PATH}.hosts")
+        except OSError:
+            pass
@@ -1,12 +1,22 @@
-from unittest.mock import patch
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import call, patch
 
 from django.conf import settings
 from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
 from django.core.exceptions import ImproperlyConfigured
-from django.core.files.storage import default_storage
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage, default_storage
+from django.db import connection, transaction
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from maintenance_mode import core, io
+from maintenance_mode import backends, core, io
 
 from .base import MaintenanceModeTestCase
 
@@ -24,6 +34,82 @@ class BackendsTestCase(MaintenanceModeTestCase):
         backend.set_value(False)
         self.assertEqual(backend.get_value(), False)
 
+    def test_backend_local_file_change_detection(self):
+        self._reset_state()
+
+        file_path = settings.MAINTENANCE_MODE_STATE_FILE_PATH
+        backend = core.get_maintenance_mode_backend()
+        backend.set_value(True)
+
+        with patch("maintenance_mode.backends.read_file", wraps=io.read_file) as mock:
+            # the state file is read only once while it doesn't change
+            self.assertEqual(backend.get_value(), True)
+            self.assertEqual(backend.get_value(), True)
+            self.assertEqual(mock.call_count, 1)
+
+            # the state file is read again when it is replaced
+            io.write_file(file_path, "0")
+            self.assertEqual(backend.get_value(), False)
+            self.assertEqual(backend.get_value(), False)
+            self.assertEqual(mock.call_count, 2)
+
+            # the state file is read again when it is deleted
+            os.remove(file_path)
+            self.assertEqual(backend.get_value(), False)
+            self.assertEqual(mock.call_count, 3)
+
+    def _wait_for_backend_value(self, backend, value, timeout=5):
+        deadline = time.monotonic() + timeout
+        while backend.get_value() != value and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return backend.get_value()
+
+    @override_settings(
+        MAINTENANCE_MODE_STATE_FILE_WATCH=True,
+        MAINTENANCE_MODE_STATE_FILE_WATCH_INTERVAL=0.05,
+    )
+    def test_backend_local_file_watch(self):
+        self._reset_state()
+
+        file_path = settings.MAINTENANCE_MODE_STATE_FILE_PATH
+        backend = core.get_maintenance_mode_backend()
+        backend.set_value(True)
+        self.assertEqual(backend.get_value(), True)
+        self.assertTrue(backend._watcher.running)
+
+        # the state is served from memory until the state file changes
+        with patch("maintenance_mode.io.os.stat") as mock_stat:
+            self.assertEqual(backend.get_value(), True)
+            mock_stat.assert_not_called()
+
+        io.write_file(file_path, "0")
+        self.assertEqual(self._wait_for_backend_value(backend, False), False)
+        io.write_file(file_path, "1")
+        self.assertEqual(self._wait_for_backend_value(backend, True), True)
+
+        backend.close()
+        self.assertIsNone(backend._watcher)
+
+    @override_settings(
+        MAINTENANCE_MODE_STATE_FILE_WATCH=True,
+        MAINTENANCE_MODE_STATE_FILE_WATCH_INTERVAL=0.05,
+    )
+    def test_backend_local_file_watch_polling(self):
+        self._reset_state()
+
+        file_path = settings.MAINTENANCE_MODE_STATE_FILE_PATH
+        backend = core.get_maintenance_mode_backend()
+        with patch("maintenance_mode.watchers._inotify_watch", side_effect=OSError):
+            backend.set_value(True)
+            self.assertEqual(backend.get_value(), True)
+        self.assertFalse(backend._watcher.inotify)
+        self.assertTrue(backend._watcher.running)
+
+        io.write_file(file_path, "0")
+        self.assertEqual(self._wait_for_backend_value(backend, False), False)
+
+        backend.close()
+
     def test_backend_schedule_state(self):
         self._reset_state()
 
@@ -94,6 +180,421 @@ class BackendsTestCase(MaintenanceModeTestCase):
             "maintenance_mode.backends.LocalFileBackend"
         )
 
+    def test_backend_storage_round_trips(self):
+        storage = InMemoryStorage()
+        backend = backends.DefaultStorageBackend()
+        with patch.object(backend, "get_storage", return_value=storage):
+            # reads use a single open(), without checking if the file exists
+            with patch.object(storage, "exists", side_effect=AssertionError):
+                self.assertEqual(backend.get_value(), False)
+
+            # the state file is overwritten without deleting it first
+            with (
+                patch.object(
+                    storage, "get_available_name", side_effect=lambda name, **kw: name
+                ),
+                patch.object(storage, "delete", side_effect=AssertionError),
+            ):
+                backend.set_value(True)
+                self.assertEqual(backend.get_value(), True)
+                backend.set_value(False)
+                self.assertEqual(backend.get_value(), False)
+
+            # storages which don't overwrite files need to delete it first
+            backend.set_value(True)
+            self.assertEqual(backend.get_value(), True)
+            self.assertEqual(storage.listdir("")[1], [backend._get_filename()])
+
+    def test_backend_storage_revalidation(self):
+        storage = InMemoryStorage()
+        backend = backends.DefaultStorageBackend()
+        modified_time = timezone.now() - timedelta(minutes=1)
+        with (
+            patch.object(backend, "get_storage", return_value=storage),
+            patch.object(storage, "get_modified_time", return_value=modified_time),
+        ):
+            backend.set_value(True)
+            self.assertEqual(backend.get_value(), True)
+
+            # the state file is not read again until its version changes
+            with patch.object(storage, "open", side_effect=AssertionError):
+                self.assertEqual(backend.get_value(), True)
+
+            storage.delete(backend._get_filename())
+            storage.save(backend._get_filename(), ContentFile(b"0"))
+            self.assertEqual(backend.get_value(), True)
+            storage.get_modified_time.return_value = timezone.now()
+            self.assertEqual(backend.get_value(), False)
+
+    @override_settings(
+        MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.DatabaseBackend"
+    )
+    def test_backend_database(self):
+        backend = core.get_maintenance_mode_backend()
+        backend.set_value(False)
+        self.assertEqual(backend.get_value(), False)
+
+        backend.set_value(True)
+        with self.assertNumQueries(1):
+            self.assertEqual(backend.get_value(), True)
+        # the version is not checked again within the check interval
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_value(), True)
+
+        value = {"start": "2000-01-01T00:00:00+00:00", "end": None}
+        backend.set_value(value)
+        self.assertEqual(backend.get_value(), value)
+        # then only the version is read, the parsed state is reused until it changes
+        with self.settings(MAINTENANCE_MODE_DATABASE_BACKEND_CHECK_INTERVAL=0):
+            with (
+                patch.object(backend, "from_str_to_state_value") as mock_parse,
+                CaptureQueriesContext(connection) as queries,
+            ):
+                self.assertEqual(backend.get_value(), value)
+                mock_parse.assert_not_called()
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn('"value"', queries[0]["sql"])
+
+            state = backend.get_model().objects.get(pk=backend.state_key)
+            self.assertEqual(state.version, 3)
+            state.delete()
+            self.assertEqual(backend.get_value(), False)
+
+    @override_settings(MAINTENANCE_MODE_STATE_BACKEND_TIMEOUT=5)
+    def test_backend_database_timeout(self):
+        backend = backends.DatabaseBackend()
+        backend.set_value(True)
+        # the database calls are not run in the thread pool
+        self.assertIsNone(backend.circuit_breaker.timeout)
+        with patch("maintenance_mode.breakers.get_executor") as mock_executor:
+            self.assertEqual(backend.get_value(), True)
+            mock_executor.assert_not_called()
+
+        # the statement timeout is not set inside a caller's transaction
+        backend.set_value(False)
+        with (
+            patch.object(connection, "vendor", "postgresql"),
+            transaction.atomic(),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            self.assertEqual(backend.get_value(), False)
+        self.assertFalse(any("set_config" in query["sql"] for query in queries))
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "scopes",
+            }
+        },
+    )
+    def test_backend_scoped_values(self):
+        value = {"start": "2000-01-01T00:00:00+00:00", "end": None}
+        for backend_path in [
+            "maintenance_mode.backends.LocalFileBackend",
+            "maintenance_mode.backends.CacheBackend",
+            "maintenance_mode.backends.DatabaseBackend",
+            "maintenance_mode.backends.MemoryBackend",
+        ]:
+            with self.subTest(backend=backend_path):
+                backend = core.get_maintenance_mode_backend(backend_path)
+                self.assertEqual(backend.get_values(["api", "shop"]), {})
+                backend.set_values({"api": True, "shop": value})
+                self.assertEqual(
+                    backend.get_values(["api", "shop", "blog"]),
+                    {"api": True, "shop": value},
+                )
+                backend.set_values({"api": False})
+                self.assertEqual(
+                    backend.get_values(["api", "shop"]), {"api": False, "shop": value}
+                )
+                # the global state is independent
+                self.assertEqual(backend.get_value(), False)
+                with self.assertRaises(ValueError):
+                    backend.set_values({"api": "on"})
+        backend = core.get_maintenance_mode_backend(
+            "maintenance_mode.backends.DatabaseBackend"
+        )
+        with self.assertNumQueries(1):
+            backend.get_values(["api", "shop", "blog"])
+        self.assertTrue(backend.supports_scopes())
+        # unsupported backends are reported by the system checks
+        backend = core.get_maintenance_mode_backend(
+            "maintenance_mode.backends.ReplicatedBackend"
+        )
+        self.assertFalse(backend.supports_scopes())
+        with self.assertRaises(NotImplementedError):
+            backend.get_values(["api"])
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "hosts",
+            }
+        },
+    )
+    def test_backend_hosts(self):
+        for backend_path in [
+            "maintenance_mode.backends.LocalFileBackend",
+            "maintenance_mode.backends.CacheBackend",
+            "maintenance_mode.backends.DatabaseBackend",
+            "maintenance_mode.backends.MemoryBackend",
+        ]:
+            with self.subTest(backend=backend_path):
+                backend = core.get_maintenance_mode_backend(backend_path)
+                self.assertEqual(backend.get_hosts(), frozenset())
+                backend.set_hosts(["a.example.com", "b.example.com"])
+                hosts = backend.get_hosts()
+                self.assertEqual(hosts, {"a.example.com", "b.example.com"})
+                backend.update_hosts(add=["c.example.com"], remove=["a.example.com"])
+                self.assertEqual(
+                    backend.get_hosts(), {"b.example.com", "c.example.com"}
+                )
+                # the global state is independent
+                self.assertEqual(backend.get_value(), False)
+                # a scope named "hosts" is independent too
+                backend.set_values({"hosts": True})
+                backend.update_hosts(add=["d.example.com"])
+                self.assertEqual(backend.get_values(["hosts"]), {"hosts": True})
+                self.assertEqual(
+                    backend.get_hosts(),
+                    {"b.example.com", "c.example.com", "d.example.com"},
+                )
+
+        # the hosts set is loaded again only when its version changes
+        backend = core.get_maintenance_mode_backend(
+            "maintenance_mode.backends.DatabaseBackend"
+        )
+        hosts = backend.get_hosts()
+        with self.assertNumQueries(1):
+            self.assertIs(backend.get_hosts(), hosts)
+        backend = core.get_maintenance_mode_backend(
+            "maintenance_mode.backends.CacheBackend"
+        )
+        hosts = backend.get_hosts()
+        with patch.object(backend, "from_str_to_hosts_value") as mock_parse:
+            self.assertIs(backend.get_hosts(), hosts)
+            mock_parse.assert_not_called()
+        self.assertTrue(backend.supports_hosts())
+        # unsupported backends are reported by the system checks
+        backend = core.get_maintenance_mode_backend(
+            "maintenance_mode.backends.ReplicatedBackend"
+        )
+        self.assertFalse(backend.supports_hosts())
+        with self.assertRaises(NotImplementedError):
+            backend.get_hosts()
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "chained",
+            }
+        },
+        MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.ChainedBackend",
+        MAINTENANCE_MODE_STATE_BACKEND_CHAIN=[
+            {"BACKEND": "maintenance_mode.backends.MemoryBackend", "TIMEOUT": 60},
+            {"BACKEND": "maintenance_mode.backends.CacheBackend", "TIMEOUT": 60},
+            {"BACKEND": "maintenance_mode.backends.DatabaseBackend"},
+        ],
+        MAINTENANCE_MODE_CACHE_BACKEND_CHECK_INTERVAL=0,
+    )
+    def test_backend_chained(self):
+        backend = core.get_maintenance_mode_backend()
+        memory, cache, database = [
+            core.get_maintenance_mode_backend(tier["BACKEND"])
+            for tier in settings.MAINTENANCE_MODE_STATE_BACKEND_CHAIN
+        ]
+        # write through all the tiers
+        backend.set_value(True)
+        self.assertEqual(memory.get_value(), True)
+        self.assertEqual(cache.get_value(), True)
+        self.assertEqual(database.get_value(), True)
+
+        # read from the first tier
+        with patch.object(database, "lookup_value", side_effect=AssertionError):
+            self.assertEqual(backend.get_value(), True)
+
+        # backfill the faster tiers on a miss (eg. evicted cache key)
+        database.set_value(False)
+        memory.close()
+        cache.get_cache().clear()
+        backend._chain[2][0] = float("-inf")
+        self.assertEqual(backend.get_value(), False)
+        self.assertEqual(memory.lookup_value(), False)
+        self.assertEqual(cache.lookup_value(), False)
+
+        # an expired tier is skipped and the next ones are read
+        database.set_value(True)
+        backend._chain[2][0] = float("-inf")
+        self.assertEqual(backend.get_value(), False)
+        with patch.object(cache, "lookup_value", return_value=None):
+            backend._chain[2][0] = float("-inf")
+            self.assertEqual(backend.get_value(), True)
+
+        # a shared tier is never overwritten by an older state,
+        # (eg. read from the durable tier before a write of another process)
+        cache.set_value(False)
+        backend._chain[2][0] = float("-inf")
+        backend._chain[2][1] = float("-inf")
+        with patch.object(database, "lookup_value", return_value=True):
+            self.assertEqual(backend.get_value(), False)
+        self.assertEqual(cache.lookup_value(), False)
+        self.assertEqual(memory.lookup_value(), False)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "replicated",
+            }
+        },
+        MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.ReplicatedBackend",
+        MAINTENANCE_MODE_STATE_BACKEND_REPLICAS=[
+            "maintenance_mode.backends.CacheBackend",
+            "maintenance_mode.backends.MemoryBackend",
+            "maintenance_mode.backends.LocalFileBackend",
+        ],
+        MAINTENANCE_MODE_STATE_BACKEND_READ_QUORUM=3,
+        MAINTENANCE_MODE_STATE_BACKEND_WRITE_QUORUM=3,
+    )
+    def test_backend_replicated(self):
+        backend = core.get_maintenance_mode_backend()
+        cache, memory, local_file = backend._get_replicas()
+        backend.set_value(True)
+        version = cache.get_versioned_value()[0]
+        self.assertEqual(backend.get_versioned_value(), (version, True))
+
+        # the highest versioned value is returned
+        cache.set_versioned_value(False, version + 1)
+        self.assertEqual(backend.get_versioned_value(), (version + 1, False))
+
+        # writes succeed when acknowledged by the write quorum
+        settings.MAINTENANCE_MODE_STATE_BACKEND_WRITE_QUORUM = 2
+        with patch.object(memory, "set_versioned_value", side_effect=OSError):
+            backend.set_value(True)
+            self.assertGreater(cache.get_versioned_value()[0], version + 1)
+            self.assertEqual(local_file.get_value(), True)
+            with patch.object(local_file, "set_versioned_value", side_effect=OSError):
+                self.assertRaises(OSError, backend.set_value, False)
+        # reads fail too when the read quorum is not reached
+        with patch.object(memory, "get_versioned_value", side_effect=OSError):
+            self.assertRaises(OSError, backend.get_value)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "replicated-failing",
+            }
+        },
+        MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.ReplicatedBackend",
+        MAINTENANCE_MODE_STATE_BACKEND_REPLICAS=[
+            "maintenance_mode.backends.CacheBackend",
+            "maintenance_mode.backends.MemoryBackend",
+        ],
+        MAINTENANCE_MODE_STATE_BACKEND_WRITE_QUORUM=2,
+    )
+    def test_backend_replicated_failing_cache(self):
+        backend = core.get_maintenance_mode_backend()
+        # a failed cache write is not counted as acknowledged
+        with patch.object(LocMemCache, "set", side_effect=RuntimeError):
+            with self.assertRaisesMessage(OSError, "Quorum not reached"):
+                backend.set_value(True)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "replicated-slow",
+            }
+        },
+        MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.ReplicatedBackend",
+        MAINTENANCE_MODE_STATE_BACKEND_REPLICAS=[
+            "maintenance_mode.backends.CacheBackend",
+            "maintenance_mode.backends.MemoryBackend",
+            "maintenance_mode.backends.LocalFileBackend",
+        ],
+        MAINTENANCE_MODE_STATE_BACKEND_REPLICA_TIMEOUT=0.5,
+    )
+    def test_backend_replicated_slow_replica(self):
+        backend = core.get_maintenance_mode_backend()
+        cache, memory, local_file = backend._get_replicas()
+        backend.set_value(True)
+        released = threading.Event()
+        self.addCleanup(released.set)
+
+        def hang():
+            released.wait(5)
+            return (None, False)
+
+        with patch.object(memory, "get_versioned_value", side_effect=hang):
+            # the quorum (majority) is reached without the replica which hangs
+            started_at = time.monotonic()
+            for _ in range(3):
+                self.assertEqual(backend.get_value(), True)
+            self.assertLess(time.monotonic() - started_at, 0.5)
+
+            # a read fails after the timeout when the quorum can't be reached
+            with self.settings(MAINTENANCE_MODE_STATE_BACKEND_READ_QUORUM=3):
+                with self.assertRaisesMessage(TimeoutError, "Quorum not reached"):
+                    backend.get_value()
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "async",
+            }
+        },
+        MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.CacheBackend",
+        MAINTENANCE_MODE_CACHE_BACKEND_CHECK_INTERVAL=0,
+    )
+    async def test_backend_cache_async(self):
+        backend = core.get_maintenance_mode_backend()
+        self.assertEqual(await backend.aget_value(), False)
+        await backend.aset_value(True)
+        self.assertEqual(await backend.aget_value(), True)
+        self.assertEqual(backend.get_value(), True)
+        backend.set_value(False)
+        self.assertEqual(await backend.aget_value(), False)
+
+        with patch.object(backend.get_cache(), "aget", side_effect=Exception):
+            self.assertEqual(
+                await backend.aget_value(),
+                settings.MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE,
+            )
+
+        # within the check interval the kept state is returned without reading
+        with override_settings(MAINTENANCE_MODE_CACHE_BACKEND_CHECK_INTERVAL=60):
+            self.assertEqual(await backend.aget_value(), False)
+            with (
+                patch.object(backend.get_cache(), "aget", side_effect=Exception),
+                patch.object(backend.get_cache(), "aget_many", side_effect=Exception),
+            ):
+                self.assertEqual(await backend.aget_value(), False)
+
+        # scoped values and hosts are not read / written in a thread
+        with patch("maintenance_mode.backends.sync_to_async") as mock_sync_to_async:
+            await backend.aset_values({"a": True})
+            self.assertEqual(await backend.aget_values(["a", "b"]), {"a": True})
+            await backend.aupdate_hosts(add=["example.com", "example.org"])
+            await backend.aupdate_hosts(remove=["example.org"])
+            self.assertEqual(await backend.aget_hosts(), frozenset({"example.com"}))
+            mock_sync_to_async.assert_not_called()
+        self.assertEqual(backend.get_values(["a"]), {"a": True})
+        self.assertEqual(backend.get_hosts(), frozenset({"example.com"}))
+        await backend.aset_hosts([])
+        self.assertEqual(await backend.aget_hosts(), frozenset())
+
+    async def test_backend_local_file_async(self):
+        backend = core.get_maintenance_mode_backend()
+        await backend.aset_value(True)
+        self.assertEqual(await backend.aget_value(), True)
+        await backend.aset_value(False)
+        self.assertEqual(await backend.aget_value(), False)
+
     def test_backend_static_storage(self):
         self._reset_state()
 
@@ -123,6 +624,43 @@ class BackendsTestCase(MaintenanceModeTestCase):
             "maintenance_mode.backends.LocalFileBackend"
         )
 
+    def test_backend_shared_memory(self):
+        self._reset_state()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with override_settings(
+                MAINTENANCE_MODE_STATE_BACKEND=(
+                    "maintenance_mode.backends.SharedMemoryBackend"
+                ),
+                MAINTENANCE_MODE_STATE_SHARED_MEMORY_PATH=os.path.join(
+                    tmp_dir, "maintenance_mode_state.shm"
+                ),
+            ):
+                backend = core.get_maintenance_mode_backend()
+                self.assertIsInstance(backend, backends.SharedMemoryBackend)
+                self.assertEqual(backend.get_value(), False)
+
+                backend.set_value(True)
+                self.assertEqual(backend.get_value(), True)
+
+                # another process sees the new state (same segment, new instance)
+                other_backend = backends.SharedMemoryBackend()
+                self.assertEqual(other_backend.get_value(), True)
+                other_backend.set_value(False)
+                self.assertEqual(backend.get_value(), False)
+
+                state = {"start": None, "end": "2026-07-14T03:00:00+00:00"}
+                other_backend.set_value(state)
+                self.assertEqual(backend.get_value(), state)
+
+                # the payload is parsed only when the sequence counter changes
+                with patch.object(backend, "from_str_to_state_value") as mock:
+                    self.assertEqual(backend.get_value(), state)
+                    mock.assert_not_called()
+
+                other_backend.close()
+                self.assertRaises(ValueError, backend.set_value, {"start": "x" * 5000})
+
     def test_backend_cache(self):
         self._reset_state()
 
@@ -148,6 +686,7 @@ class BackendsTestCase(MaintenanceModeTestCase):
         # test with default MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE setting
         with patch("maintenance_mode.backends.cache") as mock_cache:
             mock_cache.get.side_effect = Exception
+            mock_cache.get_many.side_effect = Exception
             mock_cache.set.side_effect = Exception
             backend.set_value(False)
             self.assertEqual(backend.get_value(), False)
@@ -156,6 +695,7 @@ class BackendsTestCase(MaintenanceModeTestCase):
         settings.MAINTENANCE_MODE_STATE_BACKEND_FALLBACK_VALUE = True
         with patch("maintenance_mode.backends.cache") as mock_cache:
             mock_cache.get.side_effect = Exception
+            mock_cache.get_many.side_effect = Exception
             mock_cache.set.side_effect = Exception
             backend.set_value(False)
             self.assertEqual(backend.get_value(), True)
@@ -164,6 +704,99 @@ class BackendsTestCase(MaintenanceModeTestCase):
             "maintenance_mode.backends.LocalFileBackend"
         )
 
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "default",
+            }
+        },
+        MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.CacheBackend",
+    )
+    def test_backend_cache_version(self):
+        self._reset_state()
+
+        backend = core.get_maintenance_mode_backend()
+        cache = backend.get_cache()
+        backend.set_value(True)
+        version = cache.get(backend.cache_version_key)
+        self.assertIsInstance(version, int)
+        self.assertEqual(backend.get_value(), True)
+
+        # within the check interval the kept state is returned without reading
+        with (
+            patch.object(cache, "get") as mock_get,
+            patch.object(cache, "get_many") as mock_get_many,
+        ):
+            self.assertEqual(backend.get_value(), True)
+            mock_get.assert_not_called()
+            mock_get_many.assert_not_called()
+
+        # the state changed by another process is seen after the check interval
+        backends.CacheBackend().set_value(False)
+        self.assertEqual(backend.get_value(), True)
+        with patch("time.monotonic", return_value=time.monotonic() + 1):
+            self.assertEqual(backend.get_value(), False)
+
+        with override_settings(MAINTENANCE_MODE_CACHE_BACKEND_CHECK_INTERVAL=0):
+            # while the version doesn't change only the version key is read
+            with (
+                patch.object(cache, "get", wraps=cache.get) as mock_get,
+                patch.object(cache, "get_many", wraps=cache.get_many) as mock_get_many,
+            ):
+                self.assertEqual(backend.get_value(), False)
+                mock_get.assert_called_once_with(backend.cache_version_key)
+                mock_get_many.assert_not_called()
+
+            # the version is changed by each write (eg. by another process),
+            # then the version and the value are read with a single call
+            version = cache.get(backend.cache_version_key)
+            backends.CacheBackend().set_value(True)
+            self.assertGreater(cache.get(backend.cache_version_key), version)
+            with (
+                patch.object(cache, "get", wraps=cache.get) as mock_get,
+                patch.object(cache, "get_many", wraps=cache.get_many) as mock_get_many,
+            ):
+                self.assertEqual(backend.get_value(), True)
+                # the locmem cache get_many() calls get() for each key
+                self.assertEqual(mock_get.call_count, 3)
+                self.assertEqual(
+                    mock_get.call_args_list[0], call(backend.cache_version_key)
+                )
+                mock_get_many.assert_called_once_with(
+                    [backend.cache_version_key, backend.cache_key]
+                )
+
+            # the unset state is read with a single call too
+            cache.delete_many([backend.cache_version_key, backend.cache_key])
+            with patch.object(cache, "get_many", wraps=cache.get_many) as mock_get_many:
+                self.assertEqual(backend.get_value(), False)
+                mock_get_many.assert_called_once()
+            backends.CacheBackend().set_value(True)
+            self.assertEqual(backend.get_value(), True)
+
+            # the version doesn't repeat after the version key is evicted
+            version = cache.get(backend.cache_version_key)
+            cache.delete(backend.cache_version_key)
+            backends.CacheBackend().set_value(False)
+            self.assertGreater(cache.get(backend.cache_version_key), version)
+            self.assertEqual(backend.get_value(), False)
+
+            # values written without version are read on each call
+            cache.delete(backend.cache_version_key)
+            cache.set(backend.cache_key, "1")
+            self.assertEqual(backend.get_value(), True)
+            cache.set(backend.cache_key, "0")
+            self.assertEqual(backend.get_value(), False)
+
+        # the unset state is kept within the check interval too
+        cache.delete_many([backend.cache_version_key, backend.cache_key])
+        with patch("time.monotonic", return_value=time.monotonic() + 1):
+            self.assertEqual(backend.get_value(), False)
+            with patch.object(cache, "get_many") as mock_get_many:
+                self.assertEqual(backend.get_value(), False)
+                mock_get_many.assert_not_called()
+
     def test_backend_cache_with_named_cache(self):
         self._reset_state()
 
@@ -214,6 +847,30 @@ class BackendsTestCase(MaintenanceModeTestCase):
             self.assertRaises(ImproperlyConfigured, backend.get_value)
             self.assertRaises(ImproperlyConfigured, backend.set_value, False)
 
+    def test_backend_instance_reuse(self):
+        self._reset_state()
+
+        backend = core.get_maintenance_mode_backend()
+        self.assertIs(core.get_maintenance_mode_backend(), backend)
+        self.assertIs(
+            core.get_maintenance_mode_backend(
+                "maintenance_mode.backends.LocalFileBackend"
+            ),
+            backend,
+        )
+
+        # backends are recreated when the related settings change
+        with override_settings(
+            MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.CacheBackend"
+        ):
+            cache_backend = core.get_maintenance_mode_backend()
+            self.assertIsInstance(cache_backend, backends.CacheBackend)
+            self.assertIs(core.get_maintenance_mode_backend(), cache_backend)
+        self.assertIsNot(core.get_maintenance_mode_backend(), backend)
+        self.assertIsInstance(
+            core.get_maintenance_mode_backend(), backends.LocalFileBackend
+        )
+
     def test_backend_custom_invalid(self):
         self._reset_state()
 
@@ -0,0 +1,89 @@
+import threading
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+from maintenance_mode.breakers import CircuitBreaker, CircuitBreakerOpenError
+
+
+class CircuitBreakerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(
+            "TestBackend", failure_threshold=2, retry_interval=1, max_retry_interval=4
+        )
+
+    def _fail(self, times=1):
+        for _ in range(times):
+            with self.assertRaises(OSError):
+                self.breaker.read(Mock(side_effect=OSError))
+
+    def test_breaker_open_and_half_open(self):
+        self.assertTrue(self.breaker.read(Mock(return_value=True)))
+        with self.assertLogs("maintenance_mode.breakers", "WARNING") as logs:
+            self._fail(2)
+        # failures are logged once per log interval
+        self.assertEqual(len(logs.records), 1)
+        self.assertFalse(self.breaker.closed)
+
+        # while open the backend is not called and the last good value is served
+        func = Mock(return_value=False)
+        self.assertTrue(self.breaker.read(func))
+        func.assert_not_called()
+        with self.assertRaises(CircuitBreakerOpenError):
+            self.breaker.call(func)
+
+        # after the retry interval a single probe is allowed,
+        # if it fails the retry interval is doubled
+        self.breaker._opened_until = 0
+        self._fail()
+        self.assertEqual(self.breaker._current_retry_interval, 2)
+        self.assertTrue(self.breaker.read(func))
+        func.assert_not_called()
+
+        # if it succeeds the breaker is closed
+        self.breaker._opened_until = 0
+        with self.assertLogs("maintenance_mode.breakers", "WARNING"):
+            self.assertFalse(self.breaker.read(func))
+        self.assertTrue(self.breaker.closed)
+        self.assertEqual(self.breaker._current_retry_interval, 1)
+
+    def test_breaker_write(self):
+        self.breaker.read(Mock(return_value=True))
+        self._fail(2)
+        # writes are never refused and discard the last good value
+        func = Mock(return_value=None)
+        self.breaker.write(func)
+        func.assert_called_once()
+        self.assertTrue(self.breaker.closed)
+
+    def test_breaker_ignored_exceptions(self):
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.breaker.read(Mock(side_effect=ValueError))
+        self.assertTrue(self.breaker.closed)
+
+        # a probe failed for another reason waits the retry interval too
+        self._fail(2)
+        self.breaker._opened_until = 0
+        with self.assertRaises(ValueError):
+            self.breaker.read(Mock(side_effect=ValueError))
+        self.assertGreater(self.breaker._opened_until, 0)
+        func = Mock(return_value=True)
+        with self.assertRaises(CircuitBreakerOpenError):
+            self.breaker.call(func)
+        func.assert_not_called()
+
+    def test_breaker_timeout(self):
+        self.breaker.timeout = 0.05
+        event = threading.Event()
+        with self.assertRaises(TimeoutError):
+            self.breaker.read(event.wait)
+        event.set()
+        self.assertEqual(self.breaker._failures, 1)
+
+    def test_breaker_timeout_closes_connections(self):
+        self.breaker.timeout = 5
+        with patch("maintenance_mode.utils.close_old_connections") as mock_close:
+            self.assertTrue(self.breaker.read(Mock(return_value=True)))
+        # the database connections opened by the worker thread are closed
+        mock_close.assert_called_once()
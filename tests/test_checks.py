@@ -0,0 +1,66 @@
+from django.core.checks.registry import registry
+from django.test import SimpleTestCase, override_settings
+
+from maintenance_mode.checks import (
+    check_maintenance_mode_per_host,
+    check_maintenance_mode_scopes,
+)
+
+
+class ChecksTestCase(SimpleTestCase):
+    def test_check_scopes(self):
+        self.assertIn(check_maintenance_mode_scopes, registry.get_checks())
+        self.assertEqual(check_maintenance_mode_scopes(None), [])
+        with override_settings(MAINTENANCE_MODE_SCOPES={"api": "/api/"}):
+            self.assertEqual(check_maintenance_mode_scopes(None), [])
+            for backend_path in [
+                "maintenance_mode.backends.DefaultStorageBackend",
+                "maintenance_mode.backends.SharedMemoryBackend",
+                "maintenance_mode.backends.ReplicatedBackend",
+            ]:
+                with (
+                    self.subTest(backend=backend_path),
+                    self.settings(MAINTENANCE_MODE_STATE_BACKEND=backend_path),
+                ):
+                    errors = check_maintenance_mode_scopes(None)
+                    self.assertEqual(
+                        [error.id for error in errors], ["maintenance_mode.E001"]
+                    )
+            with self.settings(
+                MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.ChainedBackend",
+                MAINTENANCE_MODE_STATE_BACKEND_CHAIN=[
+                    {"BACKEND": "maintenance_mode.backends.MemoryBackend"},
+                    {"BACKEND": "maintenance_mode.backends.StaticStorageBackend"},
+                ],
+            ):
+                errors = check_maintenance_mode_scopes(None)
+                self.assertEqual(
+                    [error.id for error in errors], ["maintenance_mode.E001"]
+                )
+
+    def test_check_per_host(self):
+        self.assertIn(check_maintenance_mode_per_host, registry.get_checks())
+        self.assertEqual(check_maintenance_mode_per_host(None), [])
+        with override_settings(MAINTENANCE_MODE_PER_HOST=True):
+            self.assertEqual(check_maintenance_mode_per_host(None), [])
+            for backend_path in [
+                "maintenance_mode.backends.DefaultStorageBackend",
+                "maintenance_mode.backends.SharedMemoryBackend",
+                "maintenance_mode.backends.ReplicatedBackend",
+            ]:
+                with (
+                    self.subTest(backend=backend_path),
+                    self.settings(MAINTENANCE_MODE_STATE_BACKEND=backend_path),
+                ):
+                    errors = check_maintenance_mode_per_host(None)
+                    self.assertEqual(
+                        [error.id for error in errors], ["maintenance_mode.E002"]
+                    )
+            with self.settings(
+                MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.ChainedBackend",
+                MAINTENANCE_MODE_STATE_BACKEND_CHAIN=[
+                    {"BACKEND": "maintenance_mode.backends.MemoryBackend"},
+                    {"BACKEND": "maintenance_mode.backends.DatabaseBackend"},
+                ],
+            ):
+                self.assertEqual(check_maintenance_mode_per_host(None), [])
@@ -1,6 +1,8 @@
 import os
+import time
 from datetime import datetime, timedelta
 from tempfile import mkstemp
+from unittest.mock import patch
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -181,6 +183,228 @@ class CoreTestCase(MaintenanceModeTestCase):
         )
         self.assertFalse(core.get_maintenance_mode())
 
+    def test_core_schedule_compiled_once(self):
+        self._reset_state()
+
+        one_hour = timedelta(hours=1)
+
+        core.set_maintenance_mode(True, end=timezone.now() + one_hour)
+        self.assertTrue(core.get_maintenance_mode())
+        with patch(
+            "maintenance_mode.core.parse_aware_datetime",
+            wraps=core.parse_aware_datetime,
+        ) as mock_parse:
+            self.assertTrue(core.get_maintenance_mode())
+            self.assertTrue(core.get_maintenance_mode())
+            mock_parse.assert_not_called()
+
+            # a new schedule is compiled once
+            core.set_maintenance_mode(True, start=timezone.now() + one_hour)
+            mock_parse.reset_mock()
+            self.assertFalse(core.get_maintenance_mode())
+            self.assertFalse(core.get_maintenance_mode())
+            self.assertEqual(mock_parse.call_count, 2)
+
+    @override_settings(MAINTENANCE_MODE_STATE_CACHE_TIMEOUT=60)
+    def test_core_state_cache(self):
+        self._reset_state()
+
+        file_path = settings.MAINTENANCE_MODE_STATE_FILE_PATH
+
+        core.set_maintenance_mode(True)
+        self.assertTrue(core.get_maintenance_mode())
+
+        # state changed by another process is not seen until the cache expires
+        io.write_file(file_path, "0")
+        self.assertTrue(core.get_maintenance_mode())
+        expired_monotonic = time.monotonic() + 61
+        with patch("maintenance_mode.state.time.monotonic") as mock_monotonic:
+            mock_monotonic.return_value = expired_monotonic
+            self.assertFalse(core.get_maintenance_mode())
+
+        # state changed in the same process invalidates the cache immediately
+        core.set_maintenance_mode(True)
+        self.assertTrue(core.get_maintenance_mode())
+        with core.override_maintenance_mode(False):
+            self.assertFalse(core.get_maintenance_mode())
+        self.assertTrue(core.get_maintenance_mode())
+
+        # explicit invalidation
+        io.write_file(file_path, "0")
+        self.assertTrue(core.get_maintenance_mode())
+        core.clear_maintenance_mode_cache()
+        self.assertFalse(core.get_maintenance_mode())
+
+    @override_settings(MAINTENANCE_MODE_STATE_REFRESH_INTERVAL=0.05)
+    def test_core_state_refresher(self):
+        self._reset_state()
+
+        file_path = settings.MAINTENANCE_MODE_STATE_FILE_PATH
+
+        core.set_maintenance_mode(True)
+        self.assertTrue(core.get_maintenance_mode())
+        self.assertTrue(core._state_refresher.running)
+
+        # the state changed by another process is refreshed in background
+        io.write_file(file_path, "0")
+        deadline = time.monotonic() + 5
+        while core.get_maintenance_mode() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(core.get_maintenance_mode())
+
+        # the state changed in the same process is seen immediately
+        core.set_maintenance_mode(True)
+        self.assertTrue(core.get_maintenance_mode())
+
+        core._state_refresher.stop()
+
+    def test_core_state_request_snapshot(self):
+        self._reset_state()
+
+        one_hour = timedelta(hours=1)
+        request = self._get_anonymous_user_request("/")
+
+        core.set_maintenance_mode(True, end=timezone.now() + one_hour)
+        state = core.get_maintenance_mode_state(request)
+        self.assertTrue(state.value)
+        self.assertIsInstance(state.schedule, dict)
+        self.assertIsInstance(state.timestamp, float)
+
+        # the state is resolved once per request
+        core.set_maintenance_mode(False)
+        self.assertIs(core.get_maintenance_mode_state(request), state)
+        self.assertTrue(core.get_maintenance_mode(request))
+        self.assertFalse(core.get_maintenance_mode())
+
+        # unless explicitly refreshed
+        state = core.get_maintenance_mode_state(request, refresh=True)
+        self.assertFalse(state.value)
+        self.assertIsNone(state.schedule)
+        self.assertFalse(core.get_maintenance_mode(request))
+
+    @override_settings(
+        MAINTENANCE_MODE_SCOPES={"api": "/api/", "api-v2": ["/api/v2/"], "shop": []}
+    )
+    def test_core_scopes(self):
+        self.assertEqual(
+            core.get_maintenance_mode_scopes("/api/v2/x/"), ["api-v2", "api"]
+        )
+        self.assertEqual(core.get_maintenance_mode_scopes("/ap"), [])
+
+        core.set_maintenance_mode(True, scope="api-v2")
+        self.assertTrue(core.get_maintenance_mode(scope="api-v2"))
+        self.assertFalse(core.get_maintenance_mode(scope="api"))
+        self.assertFalse(core.get_maintenance_mode())
+
+        request = self.request_factory.get("/api/v2/users/")
+        state = core.get_maintenance_mode_state(request)
+        self.assertTrue(state.value)
+        self.assertEqual(state.scope, "api-v2")
+        request = self.request_factory.get("/api/v1/users/")
+        self.assertFalse(core.get_maintenance_mode(request))
+
+        # all the scopes states are fetched with a single backend call
+        backend = core.get_maintenance_mode_backend()
+        with patch.object(backend, "get_values", wraps=backend.get_values) as mock:
+            request = self.request_factory.get("/api/v2/users/")
+            self.assertTrue(core.get_maintenance_mode(request))
+            mock.assert_called_once_with(["api", "api-v2", "shop"])
+
+        # the global state has priority
+        core.set_maintenance_mode(True)
+        state = core.get_maintenance_mode_state(request, refresh=True)
+        self.assertIsNone(state.scope)
+
+        with self.assertRaises(ValueError):
+            core.set_maintenance_mode(True, scope="blog")
+        with self.assertRaises(ValueError):
+            core.get_maintenance_mode(scope="blog")
+
+    @override_settings(
+        ALLOWED_HOSTS=["*"],
+        MAINTENANCE_MODE_PER_HOST=True,
+        MAINTENANCE_MODE_STATE_CACHE_TIMEOUT=60,
+    )
+    def test_core_hosts(self):
+        core.set_maintenance_mode(True, host="Tenant-1.example.com:8000")
+        self.assertTrue(core.get_maintenance_mode(host="tenant-1.example.com"))
+        self.assertFalse(core.get_maintenance_mode(host="tenant-2.example.com"))
+        self.assertFalse(core.get_maintenance_mode())
+
+        request = self.request_factory.get("/", HTTP_HOST="tenant-1.example.com")
+        self.assertTrue(core.get_maintenance_mode(request))
+        request = self.request_factory.get("/", HTTP_HOST="tenant-2.example.com")
+        self.assertFalse(core.get_maintenance_mode(request))
+
+        # the hosts set is cached, requests don't read the backend
+        backend = core.get_maintenance_mode_backend()
+        with patch.object(backend, "get_hosts", side_effect=AssertionError):
+            request = self.request_factory.get("/", HTTP_HOST="tenant-1.example.com")
+            self.assertTrue(core.get_maintenance_mode(request))
+
+        core.set_maintenance_mode(False, host="tenant-1.example.com")
+        self.assertFalse(core.get_maintenance_mode(host="tenant-1.example.com"))
+
+        with self.assertRaises(ValueError):
+            core.set_maintenance_mode(True, end="2100-01-01", host="a.example.com")
+        with self.assertRaises(ValueError):
+            core.set_maintenance_mode(True, scope="api", host="a.example.com")
+
+        # disabled by default
+        with self.settings(MAINTENANCE_MODE_PER_HOST=False):
+            core.set_maintenance_mode(True, host="tenant-1.example.com")
+            request = self.request_factory.get("/", HTTP_HOST="tenant-1.example.com")
+            self.assertFalse(core.get_maintenance_mode(request))
+
+    @override_settings(ALLOWED_HOSTS=["*"], MAINTENANCE_MODE_PER_HOST=True)
+    async def test_core_async_hosts(self):
+        await core.aset_maintenance_mode(True, host="tenant-1.example.com")
+        self.assertTrue(await core.aget_maintenance_mode(host="tenant-1.example.com"))
+        request = self.request_factory.get("/", HTTP_HOST="tenant-1.example.com")
+        self.assertTrue(await core.aget_maintenance_mode(request))
+        await core.aset_maintenance_mode(False, host="tenant-1.example.com")
+        state = await core.aget_maintenance_mode_state(request, refresh=True)
+        self.assertFalse(state.value)
+
+    @override_settings(MAINTENANCE_MODE_SCOPES={"api": "/api/"})
+    async def test_core_async_scopes(self):
+        await core.aset_maintenance_mode(True, scope="api")
+        self.assertTrue(await core.aget_maintenance_mode(scope="api"))
+        request = self.request_factory.get("/api/users/")
+        state = await core.aget_maintenance_mode_state(request)
+        self.assertEqual(state.scope, "api")
+        await core.aset_maintenance_mode(False, scope="api")
+        state = await core.aget_maintenance_mode_state(request, refresh=True)
+        self.assertFalse(state.value)
+
+    async def test_core_async(self):
+        await core.aset_maintenance_mode(True)
+        self.assertTrue(await core.aget_maintenance_mode())
+        self.assertTrue(core.get_maintenance_mode())
+
+        await core.aset_maintenance_mode(False)
+        self.assertFalse(await core.aget_maintenance_mode())
+
+        with self.assertRaises(TypeError):
+            await core.aset_maintenance_mode(1)
+
+        one_hour = timedelta(hours=1)
+        await core.aset_maintenance_mode(True, end=timezone.now() + one_hour)
+        state = await core.aget_maintenance_mode_state()
+        self.assertTrue(state.value)
+        self.assertIsInstance(state.schedule, dict)
+
+    @override_settings(MAINTENANCE_MODE_STATE_CACHE_TIMEOUT=60)
+    async def test_core_async_state_cache(self):
+        await core.aset_maintenance_mode(True)
+        self.assertTrue(await core.aget_maintenance_mode())
+
+        # the state cache is shared with the sync api
+        backend = core.get_maintenance_mode_backend()
+        with patch.object(backend, "aget_value", side_effect=AssertionError):
+            self.assertTrue(await core.aget_maintenance_mode())
+            self.assertTrue(core.get_maintenance_mode())
+
 
 class TestOverrideMaintenanceMode(SimpleTestCase):
     """
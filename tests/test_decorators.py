@@ -1,9 +1,15 @@
+from asgiref.sync import iscoroutinefunction
 from django.conf import settings
 from django.test import override_settings
 from django.urls import reverse
 
 from .base import MaintenanceModeTestCase
-from .views import force_maintenance_mode_off_view, force_maintenance_mode_on_view
+from .views import (
+    force_maintenance_mode_off_async_view,
+    force_maintenance_mode_off_view,
+    force_maintenance_mode_on_async_view,
+    force_maintenance_mode_on_view,
+)
 
 
 class DecoratorsTestCase(MaintenanceModeTestCase):
@@ -108,3 +114,19 @@ class DecoratorsTestCase(MaintenanceModeTestCase):
         self.assertEqual(
             force_maintenance_mode_on_view.__name__, "force_maintenance_mode_on_view"
         )
+
+    async def test_decorators_async_views(self):
+        request = self.request_factory.get("/")
+        request.user = self.anonymous_user
+
+        view = force_maintenance_mode_off_async_view
+        self.assertTrue(iscoroutinefunction(view))
+        self.assertTrue(view.__dict__.get("force_maintenance_mode_off"))
+        response = await view(request)
+        self.assertOkResponse(response)
+
+        view = force_maintenance_mode_on_async_view
+        self.assertTrue(iscoroutinefunction(view))
+        self.assertTrue(view.__dict__.get("force_maintenance_mode_on"))
+        response = await view(request)
+        self.assertEqual(response.status_code, settings.MAINTENANCE_MODE_STATUS_CODE)
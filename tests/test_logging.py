@@ -26,3 +26,24 @@ class LoggingTestCase(MaintenanceModeTestCase):
         self.assertTrue(f.filter(r))
         r.status_code = 200
         self.assertTrue(f.filter(r))
+
+    def test_logging_filter_request_state(self):
+        self._reset_state()
+
+        class Record:
+            status_code = 503
+
+        f = RequireNotMaintenanceMode503()
+        r = Record()
+
+        # the state already resolved for the request is reused
+        settings.MAINTENANCE_MODE = True
+        r.request = self._get_anonymous_user_request("/")
+        response = self.middleware.process_request(r.request)
+        self.assertMaintenanceResponse(response)
+        settings.MAINTENANCE_MODE = False
+        self.assertFalse(f.filter(r))
+
+        # non-request objects are ignored (eg. 'django.server' logger socket)
+        r.request = object()
+        self.assertTrue(f.filter(r))
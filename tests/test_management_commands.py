@@ -5,6 +5,7 @@ from io import StringIO
 from django.conf import settings
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.test import override_settings
 from django.utils import timezone
 
 from maintenance_mode import core
@@ -27,6 +28,64 @@ class ManagementCommandsTestCase(MaintenanceModeTestCase):
         val = core.get_maintenance_mode()
         self.assertFalse(val)
 
+    @override_settings(MAINTENANCE_MODE_SCOPES={"api": "/api/"})
+    def test_management_commands_scope(self):
+        out = StringIO()
+        call_command("maintenance_mode", "on", scope="api", verbosity=3, stdout=out)
+        self.assertTrue(core.get_maintenance_mode(scope="api"))
+        self.assertFalse(core.get_maintenance_mode())
+        self.assertIn("maintenance mode (api): on", out.getvalue())
+
+        call_command("maintenance_mode", "off", scope="api")
+        self.assertFalse(core.get_maintenance_mode(scope="api"))
+
+        with self.assertRaises(CommandError):
+            call_command("maintenance_mode", "on", scope="blog")
+
+    @override_settings(
+        MAINTENANCE_MODE_SCOPES={"api": "/api/"},
+        MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.DefaultStorageBackend",
+    )
+    def test_management_commands_scope_not_supported(self):
+        with self.assertRaisesMessage(
+            CommandError, "DefaultStorageBackend doesn't support scoped states."
+        ):
+            call_command("maintenance_mode", "on", scope="api")
+
+        command = MaintenanceModeCommand()
+        with self.assertRaises(CommandError):
+            command.get_maintenance_mode_raw_value(scope="api")
+        with self.assertRaises(CommandError):
+            command.set_maintenance_mode(True, scope="api")
+
+    def test_management_commands_host(self):
+        out = StringIO()
+        call_command(
+            "maintenance_mode", "on", host="a.example.com", verbosity=3, stdout=out
+        )
+        self.assertTrue(core.get_maintenance_mode(host="a.example.com"))
+        self.assertFalse(core.get_maintenance_mode())
+        self.assertIn("maintenance mode (a.example.com): on", out.getvalue())
+
+        call_command("maintenance_mode", "off", host="a.example.com")
+        self.assertFalse(core.get_maintenance_mode(host="a.example.com"))
+
+        with self.assertRaises(CommandError):
+            call_command("maintenance_mode", "on", host="a.example.com", scope="api")
+
+    @override_settings(
+        MAINTENANCE_MODE_STATE_BACKEND="maintenance_mode.backends.SharedMemoryBackend",
+    )
+    def test_management_commands_host_not_supported(self):
+        with self.assertRaisesMessage(
+            CommandError, "SharedMemoryBackend doesn't support per-host states."
+        ):
+            call_command("maintenance_mode", "on", host="a.example.com")
+
+        command = MaintenanceModeCommand()
+        with self.assertRaises(CommandError):
+            command.set_maintenance_mode(True, host="a.example.com")
+
     def test_management_commands_invalid_file_path(self):
         self._reset_state()
 
@@ -0,0 +1,177 @@
+import ipaddress
+import re
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.urls import (
+    Resolver404,
+    get_resolver,
+    path,
+    re_path,
+    reverse,
+    set_script_prefix,
+)
+from django.utils import translation
+
+from maintenance_mode.matchers import (
+    IPMatcher,
+    PrefixMatcher,
+    URLMatcher,
+    _get_pattern_prefix,
+    get_forced_views_matcher,
+    get_ignore_ip_addresses_matcher,
+    get_ignore_urls_matcher,
+    get_reversed_url,
+)
+
+
+class MatchersTestCase(SimpleTestCase):
+    def test_prefix_matcher(self):
+        matcher = PrefixMatcher(["/health/", "/static/", "/s/"])
+        self.assertTrue(matcher.match("/health/"))
+        self.assertTrue(matcher.match("/static/css/app.css"))
+        self.assertTrue(matcher.match("/s/x"))
+        self.assertFalse(matcher.match("/health"))
+        self.assertFalse(matcher.match("/"))
+        self.assertFalse(PrefixMatcher([]))
+
+    def test_url_matcher(self):
+        patterns = [
+            "/health/",
+            r"^/webhooks/\w+/$",
+            r"/api/v\d+/status/",
+            re.compile("/ADMIN/", re.IGNORECASE),
+            r"/(?P<lang>en|it)/about/",
+            r"/(a)\1/",
+        ]
+        matcher = URLMatcher(patterns)
+        # literal patterns are prefixes, the others are combined in one regex
+        self.assertEqual(matcher.prefix_matcher.prefixes, {"/health/"})
+        self.assertEqual(len(matcher.regexes), 4)
+        paths = [
+            "/health/check/",
+            "/webhooks/stripe/",
+            "/webhooks/stripe/x/",
+            "/api/v2/status/",
+            "/admin/",
+            "/it/about/",
+            "/aa/",
+            "/ab/",
+            "/home/",
+        ]
+        for url_path in paths:
+            with self.subTest(path=url_path):
+                expected = any(re.match(pattern, url_path) for pattern in patterns)
+                self.assertEqual(matcher.match(url_path), expected)
+
+    def test_ip_matcher(self):
+        matcher = IPMatcher(
+            [
+                "10.0.0.0/8",
+                "10.1.0.0/16",
+                "192.168.1.7/24",
+                ipaddress.ip_network("2001:db8::/32"),
+                ipaddress.ip_address("172.16.0.1"),
+                r"127\.0\.0\.\d+",
+                "not/a-network",
+            ]
+        )
+        # overlapping networks are collapsed
+        self.assertEqual(len(matcher.networks_matcher.intervals[4][0]), 3)
+        self.assertTrue(matcher.match("10.200.3.4"))
+        self.assertTrue(matcher.match("192.168.1.255"))
+        self.assertFalse(matcher.match("192.168.2.1"))
+        self.assertTrue(matcher.match("172.16.0.1"))
+        self.assertFalse(matcher.match("172.16.0.2"))
+        self.assertTrue(matcher.match("2001:db8::1"))
+        self.assertFalse(matcher.match("2001:db9::1"))
+        self.assertTrue(matcher.match("::ffff:10.0.0.1"))
+        self.assertFalse(matcher.match("9.255.255.255"))
+        # regex entries keep working
+        self.assertTrue(matcher.match("127.0.0.1"))
+        self.assertTrue(matcher.match("not/a-network"))
+        self.assertFalse(matcher.match("unknown"))
+
+    @override_settings(MAINTENANCE_MODE_IGNORE_IP_ADDRESSES=["10.0.0.0/8"])
+    def test_ignore_ip_addresses_matcher_cache(self):
+        matcher = get_ignore_ip_addresses_matcher()
+        self.assertIs(get_ignore_ip_addresses_matcher(), matcher)
+        self.assertTrue(matcher.match("10.0.0.1"))
+
+    @override_settings(MAINTENANCE_MODE_IGNORE_URLS=["/health/"])
+    def test_ignore_urls_matcher_cache(self):
+        matcher = get_ignore_urls_matcher()
+        self.assertIs(get_ignore_urls_matcher(), matcher)
+        with self.settings(MAINTENANCE_MODE_IGNORE_URLS=["/status/"]):
+            self.assertTrue(get_ignore_urls_matcher().match("/status/"))
+        settings.MAINTENANCE_MODE_IGNORE_URLS.append("/ping/")
+        self.assertTrue(get_ignore_urls_matcher().match("/ping/"))
+
+    def test_pattern_prefix(self):
+        cases = [
+            (path, "api/", ("api/", True)),
+            (path, "api/<int:pk>/", ("api/", False)),
+            (re_path, r"^api/v1/$", ("api/v1/", True)),
+            (re_path, r"^api\-v1/(?P<pk>\d+)/$", ("api-v1/", False)),
+            (re_path, r"^items?/", ("item", False)),
+            (re_path, r"api/", ("", False)),
+            (re_path, r"^foo/|^bar/", ("", False)),
+            (re_path, r"^api/(v1|v2)/$", ("", False)),
+            (re_path, r"^a\|b/$", ("a|b/", True)),
+        ]
+        for url_func, route, expected in cases:
+            with self.subTest(route=route):
+                pattern = url_func(route, lambda request: None).pattern
+                self.assertEqual(_get_pattern_prefix(pattern), expected)
+
+    @override_settings(ROOT_URLCONF="tests.urls")
+    def test_forced_views_matcher(self):
+        matcher = get_forced_views_matcher()
+        self.assertIs(get_forced_views_matcher(), matcher)
+        self.assertEqual(
+            matcher.prefix_matcher.prefixes,
+            {
+                "/maintenance-mode-off-view-func/",
+                "/maintenance-mode-off-view-class/",
+                "/maintenance-mode-on-view-func/",
+                "/maintenance-mode-on-view-class/",
+            },
+        )
+        resolver = get_resolver()
+        with patch.object(resolver, "resolve", wraps=resolver.resolve) as mock:
+            # the paths which can't match a forced view are not resolved
+            self.assertIsNone(matcher.resolve("/"))
+            self.assertIsNone(matcher.resolve("/maintenance-mode-redirect/"))
+            mock.assert_not_called()
+            view_func = matcher.resolve("/maintenance-mode-on-view-func/")
+            self.assertTrue(view_func.force_maintenance_mode_on)
+            # the results are reused
+            matcher.resolve("/maintenance-mode-on-view-func/")
+            mock.assert_called_once()
+        with self.assertRaises(Resolver404):
+            matcher.resolve("/maintenance-mode-on-view-func/404/")
+
+    @override_settings(ROOT_URLCONF="tests.urls")
+    def test_reversed_url(self):
+        with patch("maintenance_mode.matchers.reverse", wraps=reverse) as mock:
+            url = get_reversed_url("maintenance_mode_off")
+            self.assertEqual(url, "/maintenance-mode/off/")
+            self.assertEqual(get_reversed_url("maintenance_mode_off"), url)
+            # not installed urls are cached too
+            self.assertIsNone(get_reversed_url("admin:index"))
+            self.assertIsNone(get_reversed_url("admin:index"))
+            self.assertEqual(mock.call_count, 2)
+            # computed again for another script prefix
+            set_script_prefix("/app/")
+            try:
+                url = get_reversed_url("maintenance_mode_off")
+            finally:
+                set_script_prefix("/")
+            self.assertEqual(url, "/app/maintenance-mode/off/")
+            self.assertEqual(mock.call_count, 3)
+            # and for another language (eg. 'i18n_patterns' urls)
+            with translation.override("it"):
+                get_reversed_url("maintenance_mode_off")
+                get_reversed_url("maintenance_mode_off")
+            self.assertEqual(mock.call_count, 4)
@@ -1,12 +1,16 @@
 import re
+from unittest.mock import patch
 
+from asgiref.sync import iscoroutinefunction
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.http import HttpResponse, JsonResponse
 from django.test import override_settings
 from django.urls import reverse
 
-from maintenance_mode import utils
+from maintenance_mode import core, utils
+from maintenance_mode.middleware import MaintenanceModeMiddleware
+from maintenance_mode.policy import clear_maintenance_policy
 
 from .base import MaintenanceModeTestCase
 
@@ -66,10 +70,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_superuser_request("/admin/")
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -77,10 +83,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_superuser_request("/admin")
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -88,10 +96,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_superuser_request("/")
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -104,10 +114,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_superuser_request("/admin/")
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -115,10 +127,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_superuser_request("/")
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
         settings.MAINTENANCE_MODE_IGNORE_ADMIN_SITE = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -131,10 +145,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         settings.MAINTENANCE_MODE_IGNORE_IP_ADDRESSES = (
             utils.get_client_ip_address(request),
         )
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_IP_ADDRESSES = None
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -151,12 +167,14 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         settings.MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS = (
             "tests.functions.get_client_ip_address"
         )
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS = (
             "tests.functions.get_client_ip_address_invalid"
         )
+        clear_maintenance_policy()
         get_client_ip_address_error = False
         try:
             response = self.middleware.process_request(request)
@@ -167,6 +185,7 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         settings.MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS = (
             "tests.tests_invalid.get_client_ip_address"
         )
+        clear_maintenance_policy()
         get_client_ip_address_error = False
         try:
             response = self.middleware.process_request(request)
@@ -178,11 +197,13 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
             utils.get_client_ip_address(request),
         )
         settings.MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS = None
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_IP_ADDRESSES = None
         settings.MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS = None
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -193,18 +214,21 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
 
         settings.MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER = True
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = True
+        clear_maintenance_policy()
         request = self._get_authenticated_user_request("/")
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER = False
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = True
+        clear_maintenance_policy()
         request = self._get_authenticated_user_request("/")
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
         settings.MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER = False
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = False
+        clear_maintenance_policy()
         request = self._get_authenticated_user_request("/")
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
@@ -217,6 +241,7 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         # default (None): staff user inherits LOGOUT_AUTHENTICATED_USER behavior
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = True
         settings.MAINTENANCE_MODE_LOGOUT_STAFF_USER = None
+        clear_maintenance_policy()
         request = self._get_staff_user_request("/")
         self.middleware.process_request(request)
         self.assertTrue(request.user.is_anonymous)
@@ -224,6 +249,7 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         # explicit False: staff user is not logged out
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = True
         settings.MAINTENANCE_MODE_LOGOUT_STAFF_USER = False
+        clear_maintenance_policy()
         request = self._get_staff_user_request("/")
         self.middleware.process_request(request)
         self.assertTrue(request.user.is_authenticated)
@@ -231,12 +257,14 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         # explicit True: staff user is logged out
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = False
         settings.MAINTENANCE_MODE_LOGOUT_STAFF_USER = True
+        clear_maintenance_policy()
         request = self._get_staff_user_request("/")
         self.middleware.process_request(request)
         self.assertTrue(request.user.is_anonymous)
 
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = False
         settings.MAINTENANCE_MODE_LOGOUT_STAFF_USER = None
+        clear_maintenance_policy()
 
     def test_middleware_logout_superuser(self):
         self._reset_state()
@@ -246,6 +274,7 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         # default (None): superuser inherits LOGOUT_AUTHENTICATED_USER behavior
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = True
         settings.MAINTENANCE_MODE_LOGOUT_SUPERUSER = None
+        clear_maintenance_policy()
         request = self._get_superuser_request("/")
         self.middleware.process_request(request)
         self.assertTrue(request.user.is_anonymous)
@@ -253,6 +282,7 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         # explicit False: superuser is not logged out
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = True
         settings.MAINTENANCE_MODE_LOGOUT_SUPERUSER = False
+        clear_maintenance_policy()
         request = self._get_superuser_request("/")
         self.middleware.process_request(request)
         self.assertTrue(request.user.is_authenticated)
@@ -260,12 +290,14 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         # explicit True: superuser is logged out
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = False
         settings.MAINTENANCE_MODE_LOGOUT_SUPERUSER = True
+        clear_maintenance_policy()
         request = self._get_superuser_request("/")
         self.middleware.process_request(request)
         self.assertTrue(request.user.is_anonymous)
 
         settings.MAINTENANCE_MODE_LOGOUT_AUTHENTICATED_USER = False
         settings.MAINTENANCE_MODE_LOGOUT_SUPERUSER = None
+        clear_maintenance_policy()
 
     def test_middleware_ignore_anonymous_user(self):
         self._reset_state()
@@ -274,10 +306,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_anonymous_user_request("/")
 
         settings.MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -288,10 +322,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_authenticated_user_request("/")
 
         settings.MAINTENANCE_MODE_IGNORE_AUTHENTICATED_USER = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_AUTHENTICATED_USER = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -306,6 +342,7 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         settings.MAINTENANCE_MODE_GET_AUTHENTICATED_USER = (
             "tests.functions.get_authenticated_user"
         )
+        clear_maintenance_policy()
         request = self._get_anonymous_user_request("/")
         request.META["AUTHENTICATED_USER_FIELD"] = "staff-user"
         response = self.middleware.process_request(request)
@@ -318,6 +355,7 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
 
         # request without user (eg. auth middleware not installed)
         settings.MAINTENANCE_MODE_GET_AUTHENTICATED_USER = None
+        clear_maintenance_policy()
         request = self.request_factory.get("/")
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
@@ -326,6 +364,7 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         settings.MAINTENANCE_MODE_GET_AUTHENTICATED_USER = (
             "tests.tests_invalid.get_authenticated_user"
         )
+        clear_maintenance_policy()
         request = self._get_anonymous_user_request("/")
         with self.assertRaises(ImproperlyConfigured):
             self.middleware.process_request(request)
@@ -334,12 +373,14 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         settings.MAINTENANCE_MODE_GET_AUTHENTICATED_USER = (
             "tests.functions.NOT_A_FUNCTION"
         )
+        clear_maintenance_policy()
         request = self._get_anonymous_user_request("/")
         with self.assertRaises(ImproperlyConfigured):
             self.middleware.process_request(request)
 
         settings.MAINTENANCE_MODE_GET_AUTHENTICATED_USER = None
         settings.MAINTENANCE_MODE_IGNORE_STAFF = False
+        clear_maintenance_policy()
 
     def test_middleware_ignore_staff(self):
         self._reset_state()
@@ -348,10 +389,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_staff_user_request("/")
 
         settings.MAINTENANCE_MODE_IGNORE_STAFF = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_STAFF = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -362,10 +405,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_superuser_request("/")
 
         settings.MAINTENANCE_MODE_IGNORE_SUPERUSER = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_SUPERUSER = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -376,10 +421,12 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_anonymous_user_request("/")
 
         settings.MAINTENANCE_MODE_IGNORE_TESTS = True
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_TESTS = False
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -390,14 +437,17 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_anonymous_user_request("/")
 
         settings.MAINTENANCE_MODE_IGNORE_URLS = ("/",)
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_URLS = (re.compile("/"),)
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertEqual(response, None)
 
         settings.MAINTENANCE_MODE_IGNORE_URLS = None
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -408,11 +458,13 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
         request = self._get_anonymous_user_request("/")
 
         settings.MAINTENANCE_MODE_REDIRECT_URL = reverse("maintenance_mode_redirect")
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         response.client = self.client
         self.assertRedirects(response, settings.MAINTENANCE_MODE_REDIRECT_URL)
 
         settings.MAINTENANCE_MODE_REDIRECT_URL = None
+        clear_maintenance_policy()
         response = self.middleware.process_request(request)
         self.assertMaintenanceResponse(response)
 
@@ -509,3 +561,38 @@ class MiddlewareTestCase(MaintenanceModeTestCase):
             self.middleware.process_request(request)
 
         settings.MAINTENANCE_MODE_RESPONSE_TYPE = "html"
+
+    async def test_middleware_async(self):
+        async def get_response(request):
+            return HttpResponse("ok")
+
+        middleware = MaintenanceModeMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        request = self.request_factory.get("/")
+        request.user = self.anonymous_user
+
+        # no thread switch when maintenance mode is off, once the state
+        # has been read from the (default) state backend
+        settings.MAINTENANCE_MODE = None
+        core.set_maintenance_mode(False)
+        self.assertOkResponse(await middleware(request))
+        with (
+            patch("maintenance_mode.http.sync_to_async", side_effect=AssertionError),
+            patch(
+                "maintenance_mode.backends.sync_to_async", side_effect=AssertionError
+            ),
+        ):
+            response = await middleware(request)
+        self.assertOkResponse(response)
+
+        settings.MAINTENANCE_MODE = True
+        response = await middleware(request)
+        self.assertEqual(response.status_code, settings.MAINTENANCE_MODE_STATUS_CODE)
+
+        settings.MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER = True
+        clear_maintenance_policy()
+        response = await middleware(request)
+        self.assertOkResponse(response)
+        settings.MAINTENANCE_MODE_IGNORE_ANONYMOUS_USER = False
+        clear_maintenance_policy()
@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from maintenance_mode.policy import (
+    MaintenancePolicy,
+    clear_maintenance_policy,
+    get_maintenance_policy,
+)
+
+
+class MaintenancePolicyTestCase(SimpleTestCase):
+    def test_policy_enabled_checks(self):
+        policy = MaintenancePolicy()
+        self.assertEqual(policy.checks, (policy._need_maintenance_from_url,))
+
+        with self.settings(
+            MAINTENANCE_MODE_IGNORE_STAFF=True,
+            MAINTENANCE_MODE_IGNORE_URLS=["/health/"],
+            MAINTENANCE_MODE_REDIRECT_URL="/redirect/",
+        ):
+            policy = MaintenancePolicy()
+            self.assertEqual(
+                policy.checks,
+                (
+                    policy._need_maintenance_from_url,
+                    policy._need_maintenance_ignore_users,
+                    policy._need_maintenance_ignore_urls,
+                    policy._need_maintenance_redirects,
+                ),
+            )
+
+    @override_settings(
+        MAINTENANCE_MODE_IGNORE_IP_ADDRESSES=["127.0.0.1"],
+        MAINTENANCE_MODE_GET_CLIENT_IP_ADDRESS="tests.functions.get_client_ip_address",
+    )
+    def test_policy_cache(self):
+        with patch("maintenance_mode.policy.import_function") as mock_import:
+            policy = get_maintenance_policy()
+            self.assertIs(get_maintenance_policy(), policy)
+            # the configured functions are imported only once
+            mock_import.assert_called_once()
+
+        # the settings are not read again for each request
+        with patch("maintenance_mode.policy.settings", None):
+            self.assertIs(get_maintenance_policy(), policy)
+
+        # the matchers are compiled with the policy
+        with self.settings(MAINTENANCE_MODE_IGNORE_URLS=[r"^/health/"]):
+            policy = get_maintenance_policy()
+            request = RequestFactory().get("/health/")
+            request.META["CLIENT_IP_ADDRESS_FIELD"] = "10.0.0.1"
+            with (
+                patch("maintenance_mode.matchers.settings", None),
+                patch("maintenance_mode.policy.settings", None),
+            ):
+                self.assertFalse(policy.need_maintenance(request))
+                request.path_info = "/"
+                self.assertTrue(policy.need_maintenance(request))
+                request.META["CLIENT_IP_ADDRESS_FIELD"] = "127.0.0.1"
+                self.assertFalse(policy.need_maintenance(request))
+
+        # compiled again when a setting is changed
+        with self.settings(MAINTENANCE_MODE_IGNORE_URLS=["/health/"]):
+            new_policy = get_maintenance_policy()
+            self.assertIsNot(new_policy, policy)
+            self.assertIn(new_policy._need_maintenance_ignore_urls, new_policy.checks)
+
+        # or explicitly cleared when a setting is changed directly
+        policy = get_maintenance_policy()
+        settings.MAINTENANCE_MODE_IGNORE_STAFF = True
+        try:
+            self.assertIs(get_maintenance_policy(), policy)
+            clear_maintenance_policy()
+            new_policy = get_maintenance_policy()
+            self.assertIn(new_policy._need_maintenance_ignore_users, new_policy.checks)
+        finally:
+            settings.MAINTENANCE_MODE_IGNORE_STAFF = False
+            clear_maintenance_policy()
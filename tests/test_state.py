@@ -0,0 +1,109 @@
+import time
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+from maintenance_mode.state import MaintenanceModeSchedule, StateRefresher
+
+
+class StateRefresherTestCase(SimpleTestCase):
+    def setUp(self):
+        self.refresher = StateRefresher()
+
+    def tearDown(self):
+        self.refresher.stop()
+
+    def test_refresher_get(self):
+        loader = Mock(return_value=True)
+        self.assertTrue(self.refresher.get("key", loader, 60))
+        self.assertTrue(self.refresher.running)
+
+        # the last refreshed value is returned without calling the loader
+        loader.return_value = False
+        self.assertTrue(self.refresher.get("key", loader, 60, max_staleness=60))
+        self.assertEqual(loader.call_count, 1)
+
+        # unless it is too stale
+        key, value, timestamp = self.refresher._entry
+        self.refresher._entry = (key, value, timestamp - 61)
+        self.assertFalse(self.refresher.get("key", loader, 60, max_staleness=60))
+        self.assertEqual(loader.call_count, 2)
+
+        # or invalidated
+        loader.return_value = True
+        self.refresher.clear()
+        self.assertTrue(self.refresher.get("key", loader, 60))
+        self.assertEqual(loader.call_count, 3)
+
+        # or the key changes
+        self.assertTrue(self.refresher.get("other-key", loader, 60))
+        self.assertEqual(loader.call_count, 4)
+
+    def test_refresher_background_refresh(self):
+        loader = Mock(return_value=True)
+        self.assertTrue(self.refresher.get("key", loader, 0.01))
+
+        loader.return_value = False
+        deadline = time.monotonic() + 5
+        while self.refresher.get("key", loader, 0.01) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(self.refresher.get("key", loader, 0.01))
+
+        # failing refreshes keep the last refreshed value
+        loader.side_effect = OSError
+        time.sleep(0.05)
+        self.assertFalse(self.refresher.get("key", loader, 0.01))
+
+    def test_refresher_background_refresh_failures(self):
+        loader = Mock(return_value=True)
+        self.assertTrue(self.refresher.get("key", loader, 0.01))
+        loader.side_effect = OSError
+        with self.assertLogs("maintenance_mode.state", "WARNING") as logs:
+            time.sleep(0.2)
+        # failures are logged once per log interval
+        self.assertGreater(loader.call_count, 3)
+        self.assertEqual(len(logs.records), 1)
+
+
+class MaintenanceModeScheduleTestCase(SimpleTestCase):
+    def test_schedule_is_active(self):
+        schedule = MaintenanceModeSchedule(start=100.0, end=200.0)
+        self.assertFalse(schedule.is_active(now=50.0))
+        self.assertTrue(schedule.is_active(now=100.0))
+        self.assertTrue(schedule.is_active(now=150.0))
+        self.assertFalse(schedule.is_active(now=200.0))
+        self.assertFalse(schedule.is_active(now=250.0))
+
+        schedule = MaintenanceModeSchedule(start=None, end=200.0)
+        self.assertTrue(schedule.is_active(now=50.0))
+        self.assertFalse(schedule.is_active(now=250.0))
+
+        schedule = MaintenanceModeSchedule(start=100.0, end=None)
+        self.assertFalse(schedule.is_active(now=50.0))
+        self.assertTrue(schedule.is_active(now=250.0))
+
+    def test_schedule_next_transition(self):
+        schedule = MaintenanceModeSchedule(start=100.0, end=200.0)
+        self.assertEqual(schedule.get_next_transition(now=50.0), 100.0)
+        self.assertEqual(schedule.get_next_transition(now=100.0), 200.0)
+        self.assertIsNone(schedule.get_next_transition(now=200.0))
+
+        # the evaluation is kept until the next transition
+        self.assertFalse(schedule.is_active(now=50.0))
+        self.assertEqual(schedule._evaluation, (50.0, 100.0, False))
+        self.assertTrue(schedule.is_active(now=150.0))
+        self.assertEqual(schedule._evaluation, (150.0, 200.0, True))
+        self.assertFalse(schedule.is_active(now=250.0))
+        self.assertEqual(schedule._evaluation, (250.0, float("inf"), False))
+
+        # evaluated again when the clock goes backwards
+        self.assertTrue(schedule.is_active(now=150.0))
+        self.assertEqual(schedule._evaluation, (150.0, 200.0, True))
+
+    def test_schedule_now(self):
+        schedule = MaintenanceModeSchedule(start=100.0, end=200.0)
+        now = datetime.fromtimestamp(150.0, tz=timezone.utc)
+        with patch("maintenance_mode.state.get_now_datetime", return_value=now):
+            self.assertTrue(schedule.is_active())
+            self.assertEqual(schedule.get_next_transition(), 200.0)
@@ -34,3 +34,13 @@ class ForceMaintenanceModeOnView(View):
 
     def get(self, request):
         return HttpResponse()
+
+
+@force_maintenance_mode_off
+async def force_maintenance_mode_off_async_view(request):
+    return HttpResponse()
+
+
+@force_maintenance_mode_on
+async def force_maintenance_mode_on_async_view(request):
+    return HttpResponse()